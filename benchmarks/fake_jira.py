@@ -0,0 +1,158 @@
+"""In-process stand-in for the parts of the JIRA client the bot uses.
+
+It keeps issues in memory, can add latency to every call and can fail a
+share of calls with a 503 so retries and error paths can be measured.
+"""
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import List, Optional
+
+from jira import JIRAError
+
+STATUSES = ["To Do", "Open", "Selected for Development", "In Progress", "In Review", "Done"]
+TEXT_PATTERN = re.compile(r'text ~ "([^"]+)"')
+KEY_PATTERN = re.compile(r"key in \(([^)]*)\)")
+
+
+class FakeIssue:
+    def __init__(self, jira: "FakeJira", key: str, fields: dict):
+        self._jira = jira
+        self.key = key
+        self.id = key.split("-")[-1]
+        self.raw = {"key": key}
+        self.fields = SimpleNamespace(
+            summary=fields.get("summary"),
+            description=fields.get("description"),
+            status=SimpleNamespace(name="To Do"),
+            project=SimpleNamespace(key=fields["project"]["key"]),
+            issuetype=SimpleNamespace(name=(fields.get("issuetype") or {}).get("name")),
+            priority=SimpleNamespace(name=(fields.get("priority") or {}).get("name")),
+            comment=SimpleNamespace(comments=[]),
+        )
+
+    def edit(self, fields: dict) -> None:
+        for name, value in fields.items():
+            if name == "priority":
+                value = SimpleNamespace(name=value["name"])
+            setattr(self.fields, name, value)
+
+
+class FakeSession:
+    """The raw session calls the bot makes next to the client methods."""
+
+    def __init__(self, jira: "FakeJira"):
+        self._jira = jira
+
+    def put(self, url: str, data: str) -> None:
+        self._jira._call("edit")
+        self._jira.issues[url.rsplit("/", 1)[-1]].edit(json.loads(data)["fields"])
+
+
+class FakeJira:
+    """Duck-typed replacement for jira.JIRA with configurable latency and error injection."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.issues = {}
+        self._keys = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._is_cloud = False
+        self._session = FakeSession(self)
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] += 1
+            fail = self._random.random() < self.error_rate
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise JIRAError(status_code=503, text=f"injected failure in {operation}")
+
+    @staticmethod
+    def _get_url(path: str) -> str:
+        return f"https://jira.invalid/rest/api/2/{path}"
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def search_issues(self, jql: str, maxResults: int = 50, **kwargs) -> List[FakeIssue]:
+        self._call("search")
+        with self._lock:
+            issues = list(self.issues.values())
+        keys = KEY_PATTERN.search(jql)
+        if keys:
+            wanted = {k.strip().strip('"') for k in keys.group(1).split(",")}
+            matches = [i for i in issues if i.key in wanted]
+        else:
+            terms = TEXT_PATTERN.findall(jql)
+            matches = [i for i in issues if any(t in (i.fields.description or "") for t in terms)]
+        return matches[::-1][:maxResults or None]
+
+    def issue(self, key: str, fields: Optional[str] = None, expand: Optional[str] = None) -> FakeIssue:
+        self._call("get")
+        issue = self.issues.get(key)
+        if issue is None:
+            raise JIRAError(status_code=404, text=f"Issue {key} does not exist")
+        issue.raw = {"key": key}
+        if expand and "transitions" in expand:
+            issue.raw["transitions"] = self._transitions_from(issue.fields.status.name)
+        return issue
+
+    def create_issue(self, fields: dict, prefetch: bool = True) -> FakeIssue:
+        self._call("create")
+        key = f"{fields['project']['key']}-{next(self._keys)}"
+        issue = FakeIssue(self, key, fields)
+        with self._lock:
+            self.issues[key] = issue
+        return issue
+
+    def create_issues(self, field_list: List[dict], prefetch: bool = True) -> List[dict]:
+        self._call("bulk_create")
+        created = []
+        for fields in field_list:
+            key = f"{fields['project']['key']}-{next(self._keys)}"
+            issue = FakeIssue(self, key, fields)
+            with self._lock:
+                self.issues[key] = issue
+            created.append({"status": "Success", "error": None, "issue": issue, "input_fields": fields})
+        return created
+
+    def add_comment(self, issue, body: str):
+        self._call("comment")
+        issue = self.issues[getattr(issue, "key", issue)]
+        comment = SimpleNamespace(body=body)
+        issue.fields.comment.comments.append(comment)
+        return comment
+
+    def comments(self, issue_key: str):
+        self._call("comments")
+        return list(self.issues[issue_key].fields.comment.comments)
+
+    def transitions(self, issue, **kwargs) -> List[dict]:
+        self._call("transitions")
+        return self._transitions_from(self.issues[getattr(issue, "key", issue)].fields.status.name)
+
+    @staticmethod
+    def _transitions_from(current: str) -> List[dict]:
+        index = STATUSES.index(current) if current in STATUSES else 0
+        # A linear workflow: one step forward or back, or straight back to the start
+        targets = {STATUSES[0]} | {STATUSES[i] for i in (index - 1, index + 1) if 0 <= i < len(STATUSES)}
+        targets.discard(current)
+        return [{"id": str(STATUSES.index(t) + 11), "name": t, "to": {"name": t}} for t in targets]
+
+    def transition_issue(self, issue, transition, **kwargs) -> None:
+        self._call("transition")
+        issue = self.issues[getattr(issue, "key", issue)]
+        issue.fields.status = SimpleNamespace(name=STATUSES[int(transition) - 11])
@@ -0,0 +1,215 @@
+"""Replay Launchpad webhooks through the FastAPI app against a fake Jira.
+
+Usage:
+    python -m benchmarks.replay [--capture webhooks.jsonl] [--concurrency 1,4,16]
+                                [--latency-ms 50] [--error-rate 0.01]
+
+The capture is JSON lines, one webhook per line: either the bare payload or
+{"payload": {...}, "query": "yaml=..."}. Without a capture a synthetic mix of
+bug creations, comments and field changes is generated. Events of one bug
+are always replayed in order by the same client thread.
+"""
+import argparse
+import hashlib
+import hmac
+import importlib
+import json
+import statistics
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_jira import FakeJira, STATUSES
+from lp_jira_sync_app.utils import config as cfg
+from lp_jira_sync_app.utils import async_jira, jira_utils
+from lp_jira_sync_app.utils.issue_index import get_issue_index
+from lp_jira_sync_app.utils.lookup_batcher import LookupBatcher, AsyncLookupBatcher
+
+SECRET = "benchmark-secret"
+LP_STATUSES = ["New", "Confirmed", "Triaged", "In Progress", "Fix Committed", "Fix Released"]
+
+
+def synthetic_events(bugs: int, comments: int, changes: int) -> List[dict]:
+    events = []
+    for bug in range(1, bugs + 1):
+        new = {
+            "title": f"Bug {bug}",
+            "description": "Steps to reproduce\n" * 20,
+            "reporter": "/~reporter",
+            "tags": [],
+            "status": "New",
+            "importance": "Undecided",
+            "assignee": None,
+        }
+        base = {"target": "/benchproject", "bug": f"/bugs/{bug}"}
+        events.append({"action": "created", **base, "new": dict(new)})
+        for c in range(1, comments + 1):
+            events.append({"action": "created", **base, "bug_comment": f"/bugs/{bug}/comments/{c}",
+                           "new": {"commenter": "/~commenter", "content": f"Comment {c}"}})
+        for c in range(changes):
+            old = dict(new)
+            if c % 2 == 0:
+                new["status"] = LP_STATUSES[(c // 2 + 1) % len(LP_STATUSES)]
+                action = "status-changed"
+            else:
+                new["title"] = f"Bug {bug} (edit {c})"
+                action = "title-changed"
+            events.append({"action": action, **base, "old": old, "new": dict(new)})
+    return [{"payload": event, "query": ""} for event in events]
+
+
+def load_capture(path: str) -> List[dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "payload" not in record:
+                record = {"payload": record, "query": ""}
+            events.append(record)
+    return events
+
+
+def group_by_bug(events: List[dict]) -> List[List[dict]]:
+    groups: Dict[str, List[dict]] = OrderedDict()
+    for event in events:
+        groups.setdefault(event["payload"].get("bug") or "", []).append(event)
+    return list(groups.values())
+
+
+def reset_caches() -> None:
+    """Drop what earlier levels learned so every level starts cold."""
+    jira_utils.transition_graph.clear()
+    batcher = jira_utils.lookup_batcher
+    jira_utils.lookup_batcher = LookupBatcher(batcher.window, batcher.max_size)
+    async_jira.lookup_batcher = AsyncLookupBatcher(batcher.window, batcher.max_size)
+    index = get_issue_index()
+    if index:
+        index.clear()
+
+
+def build_app(args, fake: FakeJira):
+    cfg.global_config["app"] = {
+        "launchpad_webhook_secret_code": SECRET,
+        "launchpad_url": "https://launchpad.net",
+        "jira_instance": "https://jira.invalid",
+        "jira_username": "bench",
+        "jira_token": "bench",
+        "state_db_path": args.state_db,
+    }
+    cfg.global_config["project"] = {
+        "jira_project_key": "BENCH",
+        "jira_issue_type": "Bug",
+        "sync_description": True,
+        "sync_comments": True,
+        "status_mapping": dict(zip(LP_STATUSES, STATUSES)),
+        "severity_mapping": {"Undecided": "Medium"},
+    }
+    cfg.project_config_cache.clear()
+    reset_caches()
+
+    import lp_jira_sync_app.main as main
+    import lp_jira_sync_app.utils.launchpad_utils as launchpad_utils
+    main = importlib.reload(main)
+    main.get_jira_client = lambda: fake
+    launchpad_utils.get_jira_client = lambda: fake
+    return main.app
+
+
+def post(client: TestClient, event: dict) -> int:
+    body = json.dumps(event["payload"]).encode("utf-8")
+    signature = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha1).hexdigest()
+    url = "/" + (f"?{event['query']}" if event.get("query") else "")
+    response = client.post(url, content=body, headers={
+        "Content-Type": "application/json",
+        "X-Hub-Signature": f"sha1={signature}",
+    })
+    return response.status_code
+
+
+def run_level(args, events: List[dict], concurrency: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.with_index:
+            args.state_db = f"{tmp}/state.db"
+        fake = FakeJira(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                        error_rate=args.error_rate, seed=args.seed)
+        app = build_app(args, fake)
+        groups = group_by_bug(events)
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        lock = threading.Lock()
+        local = threading.local()
+
+        def replay_group(group: List[dict]) -> None:
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = TestClient(app, raise_server_exceptions=False)
+            for event in group:
+                started = time.perf_counter()
+                code = post(client, event)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[code] = statuses.get(code, 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(replay_group, groups))
+        wall = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "concurrency": concurrency,
+        "events": len(latencies),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "jira_calls_per_event": fake.total_calls() / max(1, len(latencies)),
+        "jira_calls": dict(fake.calls),
+        "statuses": statuses,
+    }
+
+
+def print_report(results: List[dict]) -> None:
+    print(f"{'conc':>5} {'events':>7} {'ev/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls/ev':>9}  statuses")
+    for r in results:
+        print(f"{r['concurrency']:>5} {r['events']:>7} {r['throughput']:>9.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['jira_calls_per_event']:>9.2f}  {r['statuses']}")
+    for r in results:
+        print(f"conc={r['concurrency']} jira calls: {r['jira_calls']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.replay")
+    parser.add_argument("--capture", help="JSON lines file of recorded webhooks (default: synthetic events)")
+    parser.add_argument("--bugs", type=int, default=100, help="Synthetic bugs to generate")
+    parser.add_argument("--comments", type=int, default=3, help="Synthetic comments per bug")
+    parser.add_argument("--changes", type=int, default=4, help="Synthetic *-changed events per bug")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated client thread counts")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake Jira latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Extra random latency per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of Jira calls failing with 503")
+    parser.add_argument("--with-index", action="store_true", help="Use a temporary state database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+    args.state_db = None
+
+    events = load_capture(args.capture) if args.capture else synthetic_events(args.bugs, args.comments, args.changes)
+    results = [run_level(args, events, int(level)) for level in args.concurrency.split(",")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Maintenance commands for the Launchpad to Jira sync bot.
+
+Usage: python -m lp_jira_sync_app.cli <command> [options]
+"""
+import argparse
+import os
+import sys
+
+from lp_jira_sync_app.utils.config import global_config, logger, merge_project_config
+from lp_jira_sync_app.utils.issue_index import get_issue_index
+from lp_jira_sync_app.utils.comment_index import get_comment_index
+from lp_jira_sync_app.utils.outbox import get_outbox
+from lp_jira_sync_app.utils.state_db import get_state_db
+from lp_jira_sync_app.utils.jira_clients import get_jira_client
+from lp_jira_sync_app.utils.bulk_import import BulkImporter, DEFAULT_CHUNK_SIZE, DEFAULT_TRANSITION_WORKERS
+from lp_jira_sync_app.utils.reconcile import Reconciler, read_snapshot, DEFAULT_BATCH_SIZE
+from lp_jira_sync_app.utils.jira_utils import build_jira_client, iter_issue_pages, BUG_URL_PATTERN, \
+    rebuild_comment_index
+
+
+def backfill_issue_index(args) -> int:
+    """Fill the issue index from issues that already exist in Jira."""
+    index = get_issue_index()
+    if not index:
+        logger.error("app.state_db_path is not configured, nothing to backfill")
+        return 1
+
+    jira_client = build_jira_client()
+    jql = f"project = \"{args.project}\" AND text ~ \"created from Launchpad issue\" ORDER BY created ASC"
+    total = 0
+    for issues in iter_issue_pages(jira_client, jql, "description", args.batch_size):
+        rows = []
+        for issue in issues:
+            match = BUG_URL_PATTERN.search((issue.get("fields") or {}).get("description") or "")
+            if match:
+                rows.append((match.group(1), args.project, issue["key"]))
+        index.put_many(rows)
+        total += len(rows)
+        logger.info(f"Indexed {total} Jira issues of {args.project}")
+    return 0
+
+
+def rebuild_comment_indexes(args) -> int:
+    """Scan the comments of indexed issues that were synced before the comment index existed."""
+    issue_index = get_issue_index()
+    comment_index = get_comment_index()
+    if not issue_index or not comment_index:
+        logger.error("app.state_db_path is not configured, nothing to rebuild")
+        return 1
+
+    jira_client = build_jira_client()
+    rebuilt = 0
+    for issue_key in issue_index.issue_keys(args.project):
+        if comment_index.is_indexed(issue_key) and not args.force:
+            continue
+        found = rebuild_comment_index(jira_client, issue_key)
+        rebuilt += 1
+        logger.info(f"Indexed {found} Launchpad comments on {issue_key}")
+    logger.info(f"Rebuilt comment index for {rebuilt} Jira issues of {args.project}")
+    return 0
+
+
+def list_dead_letters(args) -> int:
+    """Print events that exhausted their retries."""
+    outbox = get_outbox()
+    if not outbox:
+        logger.error("app.outbox_enabled and app.state_db_path must be set to use the outbox")
+        return 1
+    for letter in outbox.dead_letters():
+        print(f"{letter['id']}\t{letter['bug']}\tattempts={letter['attempts']}\t{letter['last_error']}")
+    return 0
+
+
+def replay_dead_letters(args) -> int:
+    """Move dead letters back into the outbox; the running service picks them up."""
+    outbox = get_outbox()
+    if not outbox:
+        logger.error("app.outbox_enabled and app.state_db_path must be set to use the outbox")
+        return 1
+    moved = outbox.replay_dead_letters(args.ids)
+    logger.info(f"Moved {moved} dead letters back to the outbox")
+    return 0
+
+
+def bulk_import(args) -> int:
+    """Create Jira issues for a Launchpad bug export (JSON lines of webhook-shaped payloads)."""
+    db = get_state_db()
+    if not db:
+        logger.error("app.state_db_path is not configured, it is needed to skip synced bugs and resume")
+        return 1
+    importer = BulkImporter(
+        get_jira_client(), db, merge_project_config(args.yaml),
+        checkpoint_name=args.checkpoint or os.path.abspath(args.file),
+        chunk_size=args.chunk_size, transition_workers=args.workers,
+    )
+    stats = importer.run(args.file)
+    logger.info(f"Bulk import finished: {stats}")
+    return 0 if not stats["failed"] else 2
+
+
+def reconcile(args) -> int:
+    """Repair Jira issues that drifted from a Launchpad state snapshot."""
+    db = get_state_db()
+    if not db:
+        logger.error("app.state_db_path is not configured, it is needed to find issues and keep the high-water mark")
+        return 1
+    reconciler = Reconciler(
+        build_jira_client(), db, merge_project_config(args.yaml),
+        max_seconds=args.max_seconds, max_api_calls=args.max_api_calls,
+        batch_size=args.batch_size, dry_run=args.dry_run,
+    )
+    stats = reconciler.run(read_snapshot(args.file))
+    logger.info(f"Reconciliation finished: {stats}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    project_key = (global_config.get("project") or {}).get("jira_project_key")
+    parser = argparse.ArgumentParser(prog="lp_jira_sync_app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-index", help="Index existing Jira issues by Launchpad bug URL")
+    backfill.add_argument("--project", default=project_key, required=not project_key,
+                          help="Jira project key (default: project.jira_project_key)")
+    backfill.add_argument("--batch-size", type=int, default=100, help="Issues fetched per search page")
+    backfill.set_defaults(func=backfill_issue_index)
+
+    comments = commands.add_parser("rebuild-comment-index",
+                                   help="Index comments of issues synced before the comment index existed "
+                                        "(run backfill-index first)")
+    comments.add_argument("--project", default=project_key, required=not project_key,
+                          help="Jira project key (default: project.jira_project_key)")
+    comments.add_argument("--force", action="store_true", help="Rescan issues that are already indexed")
+    comments.set_defaults(func=rebuild_comment_indexes)
+
+    importer = commands.add_parser("bulk-import", help="Create Jira issues for existing Launchpad bugs")
+    importer.add_argument("file", help="JSON lines export, one bug creation payload per line")
+    importer.add_argument("--yaml", help="Base64 project config, as in the webhook \"yaml\" parameter")
+    importer.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                          help="Issues per bulk create request (at most 50)")
+    importer.add_argument("--workers", type=int, default=DEFAULT_TRANSITION_WORKERS,
+                          help="Threads running status transitions")
+    importer.add_argument("--checkpoint", help="Checkpoint name to resume (default: the file's path)")
+    importer.set_defaults(func=bulk_import)
+
+    reconciler = commands.add_parser("reconcile", help="Repair drift between Launchpad and Jira")
+    reconciler.add_argument("file", help="JSON lines snapshot of Launchpad bugs in webhook payload shape, "
+                                         "with date_last_updated")
+    reconciler.add_argument("--yaml", help="Base64 project config, as in the webhook \"yaml\" parameter")
+    reconciler.add_argument("--max-seconds", type=float, default=300, help="Stop the run after this long")
+    reconciler.add_argument("--max-api-calls", type=int, default=1000, help="Stop the run after this many Jira calls")
+    reconciler.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Issues fetched per key in (...) search")
+    reconciler.add_argument("--dry-run", action="store_true", help="Report drift without changing Jira")
+    reconciler.set_defaults(func=reconcile)
+
+    dead_letters = commands.add_parser("list-dead-letters", help="Show events that failed permanently")
+    dead_letters.set_defaults(func=list_dead_letters)
+
+    replay = commands.add_parser("replay-dead-letters", help="Queue dead-lettered events for another attempt")
+    replay.add_argument("--id", dest="ids", type=int, action="append", help="Dead letter id (default: all)")
+    replay.set_defaults(func=replay_dead_letters)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
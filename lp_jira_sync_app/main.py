@@ -1,30 +1,199 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+import json
+import math
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException, status
-from starlette.responses import JSONResponse
-from .utils.config import merge_project_config, global_config, logger
-from .utils.launchpad_utils import sync_launchpad_action
+from starlette.responses import JSONResponse, PlainTextResponse
+from .utils.config import merge_project_config, global_config, logger, project_config_cache
+from .utils.launchpad_utils import sync_launchpad_action, sync_launchpad_action_async, process_launchpad_event, \
+    change_coalescer
+from .utils.async_jira import get_async_jira_client, invalidate_async_jira_client, AsyncClientWarmer
 from .utils.security import require_hmac_signature
-from .utils.jira_utils import build_jira_client
+from .utils.payload import validate_webhook_payload, DEFAULT_MAX_BODY_BYTES
+from .utils.jira_clients import get_jira_client, jira_client_pool, PoolWarmer
+from .utils.worker_pool import WebhookWorkerPool, DEFAULT_WORKER_COUNT, DEFAULT_QUEUE_SIZE
+from .utils.outbox import get_outbox, OutboxPoller, PENDING
+from .utils.idempotency import get_delivery_cache, delivery_key
+from .utils.circuit_breaker import jira_breaker
+from .utils.metrics import registry, Gauge, STAGE_SECONDS, WEBHOOKS, action_type
+
+APP_CONFIG = global_config.get("app") or {}
+SECRET_CODE = APP_CONFIG.get("launchpad_webhook_secret_code") or ""
+ASYNC_PROCESSING = bool(APP_CONFIG.get("async_processing"))
+ASYNC_JIRA_CLIENT = bool(APP_CONFIG.get("async_jira_client"))
+RETRY_AFTER_SECONDS = str(APP_CONFIG.get("queue_full_retry_after") or 30)
+MAX_BODY_BYTES = int(APP_CONFIG.get("max_body_bytes") or DEFAULT_MAX_BODY_BYTES)
+
+worker_pool = WebhookWorkerPool(
+    process_launchpad_event,
+    worker_count=int(APP_CONFIG.get("worker_count") or DEFAULT_WORKER_COUNT),
+    queue_size=int(APP_CONFIG.get("queue_size") or DEFAULT_QUEUE_SIZE),
+)
+# Accepted events are persisted until synced so they survive Jira outages and restarts
+outbox = get_outbox() if ASYNC_PROCESSING else None
+outbox_poller = OutboxPoller(outbox, worker_pool.submit,
+                             paused=jira_breaker.is_open if jira_breaker else None) if outbox else None
+# Builds the Jira client and opens its first connection before traffic is routed here
+pool_warmer = PoolWarmer(jira_client_pool)
+async_client_warmer = AsyncClientWarmer() if ASYNC_JIRA_CLIENT else None
+# Responses to recent deliveries, returned as-is when Launchpad redelivers a webhook
+delivery_cache = get_delivery_cache()
+
+registry.register(Gauge("lp_jira_sync_queue_depth", "Events waiting on the worker lanes",
+                        callback=worker_pool.qsize))
+registry.register(Gauge("lp_jira_sync_lane_queue_depth", "Events waiting per worker lane", ["lane"],
+                        callback=lambda: [((str(lane["lane"]),), lane["queued"]) for lane in worker_pool.lane_stats()]))
+registry.register(Gauge("lp_jira_sync_lane_busy_seconds", "Seconds each worker lane spent syncing events", ["lane"],
+                        callback=lambda: [((str(lane["lane"]),), lane["busy_seconds"])
+                                          for lane in worker_pool.lane_stats()]))
+registry.register(Gauge("lp_jira_sync_coalescer_pending", "Bugs with *-changed events waiting to be merged",
+                        callback=change_coalescer.pending_count))
+registry.register(Gauge("lp_jira_sync_project_config_cache", "Project config cache lookups", ["result"],
+                        callback=lambda: [(("hit",), project_config_cache.hits),
+                                          (("miss",), project_config_cache.misses)]))
+registry.register(Gauge("lp_jira_sync_startup_seconds", "Time spent in each startup phase", ["phase"],
+                        callback=lambda: startup_phases()))
+if delivery_cache:
+    registry.register(Gauge("lp_jira_sync_delivery_cache", "Webhook delivery cache lookups", ["result"],
+                            callback=lambda: [(("hit",), delivery_cache.hits),
+                                              (("miss",), delivery_cache.misses)]))
+if outbox:
+    registry.register(Gauge("lp_jira_sync_outbox_pending", "Events stored in the outbox",
+                            callback=outbox.pending_count))
+
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+logger.info(f"Application imported in {IMPORT_SECONDS * 1000:.0f} ms")
+
+
+def startup_phases():
+    phases = [(("import",), IMPORT_SECONDS)]
+    if pool_warmer.seconds is not None:
+        phases.append((("jira_warmup",), pool_warmer.seconds))
+    if async_client_warmer and async_client_warmer.seconds is not None:
+        phases.append((("async_jira_warmup",), async_client_warmer.seconds))
+    return phases
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    pool_warmer.start()
+    if async_client_warmer:
+        async_client_warmer.start()
+    if outbox_poller:
+        outbox_poller.start()
+    yield
+    pool_warmer.stop()
+    if async_client_warmer:
+        async_client_warmer.stop()
+    await invalidate_async_jira_client()
+    change_coalescer.flush_all()
+    if outbox_poller:
+        outbox_poller.stop()
+    worker_pool.stop()
+
 
-SECRET_CODE = (global_config.get("app") or {}).get("launchpad_webhook_secret_code") or ""
+app = FastAPI(lifespan=lifespan)
 
 
-app = FastAPI()
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "ok"})
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the Jira clients are built and have an open connection."""
+    if not pool_warmer.ready.is_set() or (async_client_warmer and not async_client_warmer.ready.is_set()):
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "warming up"})
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "ready"})
+
 
 @app.post("/")
-@require_hmac_signature(SECRET_CODE)
+@require_hmac_signature(SECRET_CODE, MAX_BODY_BYTES)
 async def webhook_handler(request: Request):
 
-    payload = await request.json()
+    key = delivery_key(request, delivery_cache.body_digest) if delivery_cache else None
+    if key:
+        cached = delivery_cache.get(key)
+        if cached:
+            logger.info(f"Webhook delivery {key} was already handled, returning the stored response")
+            return JSONResponse(status_code=cached[0], content=cached[1])
+    try:
+        response = await handle_webhook(request)
+    except HTTPException as e:
+        # Rejections such as "issue already exists" are final; server errors are retried
+        if key and e.status_code < 500:
+            delivery_cache.put(key, e.status_code, {"detail": e.detail})
+        raise
+    if key:
+        delivery_cache.put(key, response.status_code, json.loads(response.body))
+    return response
+
+
+async def handle_webhook(request: Request) -> JSONResponse:
+    # Parsed once by require_hmac_signature
+    payload = request.state.payload
+    if not validate_webhook_payload(payload):
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Change is not synced, ignored"})
     yaml_param = request.query_params.get("yaml") if hasattr(request, "query_params") else None
-    project_config = merge_project_config(yaml_param)
-    # Prepare Jira client
+    with STAGE_SECONDS.time("merge_project_config"):
+        project_config = merge_project_config(yaml_param)
+    WEBHOOKS.inc(action_type(payload))
+
+    if ASYNC_PROCESSING:
+        open_delay = jira_breaker.open_delay() if jira_breaker else None
+        if open_delay is not None:
+            if not outbox:
+                raise circuit_open()
+            # Park the event; the poller hands it out once the breaker lets probes through
+            outbox_poller.start()
+            outbox.add(payload, project_config, delay=open_delay, state=PENDING)
+            return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"message": "Webhook accepted"})
+
+        # Hand the event to the workers and acknowledge right away
+        extra = ()
+        if outbox:
+            outbox_poller.start()
+            extra = (outbox.add(payload, project_config),)
+        if not worker_pool.submit(payload, project_config, *extra):
+            if outbox:
+                outbox.remove(extra[0])
+            logger.error("Webhook queue is full, rejecting event")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                headers={"Retry-After": RETRY_AFTER_SECONDS})
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"message": "Webhook accepted"})
+
+    if jira_breaker and not jira_breaker.allow():
+        raise circuit_open()
+
+    # Reuse the shared Jira client
     try:
-        jira = build_jira_client()
+        jira = get_async_jira_client() if ASYNC_JIRA_CLIENT else get_jira_client()
     except Exception as e:
         logger.error(f"Failed to build JIRA client: {e}")
         raise HTTPException(status_code=500)
 
-    sync_launchpad_action(payload, jira, project_config)
+    if ASYNC_JIRA_CLIENT:
+        await sync_launchpad_action_async(payload, jira, project_config)
+    else:
+        sync_launchpad_action(payload, jira, project_config)
 
     return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Webhook received and validated"})
 
+
+def circuit_open() -> HTTPException:
+    """Fast rejection while Jira is failing, asking Launchpad to come back when a probe is allowed."""
+    logger.warning("Jira circuit breaker is open, rejecting event")
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                         headers={"Retry-After": str(max(1, math.ceil(jira_breaker.retry_after())))})
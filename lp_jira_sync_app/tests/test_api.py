@@ -11,7 +11,7 @@ def hmac_header(body: bytes, secret: str) -> dict:
     return {"X-Hub-Signature": f"sha1={mac.hexdigest()}"}
 
 
-def build_app_with_secret(monkeypatch, secret: str):
+def build_app_with_secret(monkeypatch, secret: str, **app_options):
     from lp_jira_sync_app.utils import config as cfg
     cfg.global_config["app"] = {
         "launchpad_webhook_secret_code": secret,
@@ -19,6 +19,7 @@ def build_app_with_secret(monkeypatch, secret: str):
         "jira_username": "user",
         "jira_token": "token",
         "launchpad_url": "https://launchpad.net",
+        **app_options,
     }
     cfg.global_config["project"] = {
         "jira_project_key": "PRJ",
@@ -27,6 +28,7 @@ def build_app_with_secret(monkeypatch, secret: str):
         "severity_mapping": {"High": "High"},
         "sync_description": False,
     }
+    cfg.project_config_cache.clear()
 
     # Reload main to re-evaluate decorator with the new SECRET_CODE
     import lp_jira_sync_app.main as main
@@ -37,7 +39,7 @@ def build_app_with_secret(monkeypatch, secret: str):
 def test_post_requires_valid_signature(monkeypatch):
     main = build_app_with_secret(monkeypatch, secret="s3cr3t")
     monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: None)
-    monkeypatch.setattr(main, "build_jira_client", lambda: None)
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
     client = TestClient(main.app)
 
     payload = {"action": "created", "bug": "/bugs/1", "new": {"title": "t"}}
@@ -66,7 +68,7 @@ def test_post_requires_valid_signature(monkeypatch):
 def test_post_returns_400_on_empty_payload(monkeypatch):
     main = build_app_with_secret(monkeypatch, secret="xyz")
     monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: None)
-    monkeypatch.setattr(main, "build_jira_client", lambda: None)
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
 
     client = TestClient(main.app)
 
@@ -80,10 +82,10 @@ def test_post_returns_400_on_empty_payload(monkeypatch):
 def test_post_root_returns_500_when_jira_client_fails(monkeypatch):
     main = build_app_with_secret(monkeypatch, secret="abc")
 
-    def build_jira_client():
+    def get_jira_client():
         raise RuntimeError("no jira")
 
-    monkeypatch.setattr(main, "build_jira_client", build_jira_client)
+    monkeypatch.setattr(main, "get_jira_client", get_jira_client)
 
     client = TestClient(main.app)
 
@@ -93,3 +95,146 @@ def test_post_root_returns_500_when_jira_client_fails(monkeypatch):
 
     r = client.post("/", data=body, headers=headers)
     assert r.status_code == 500
+
+
+def test_post_is_queued_in_async_mode(monkeypatch):
+    main = build_app_with_secret(monkeypatch, secret="abc", async_processing=True)
+    queued = []
+    monkeypatch.setattr(main.worker_pool, "submit", lambda *args: queued.append(args) or True)
+    client = TestClient(main.app)
+
+    payload = {"action": "created", "bug": "/bugs/1", "new": {"title": "t"}}
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json", **hmac_header(body, "abc")}
+
+    r = client.post("/", data=body, headers=headers)
+    assert r.status_code == 202
+    assert queued[0][0] == payload
+
+    # Full queue -> 503 with Retry-After
+    monkeypatch.setattr(main.worker_pool, "submit", lambda *args: False)
+    r = client.post("/", data=body, headers=headers)
+    assert r.status_code == 503
+    assert r.headers.get("Retry-After")
+
+
+def test_metrics_report_pipeline_stages(monkeypatch):
+    main = build_app_with_secret(monkeypatch, secret="abc")
+    monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: None)
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
+    client = TestClient(main.app)
+
+    payload = {"action": "created", "bug": "/bugs/1", "new": {"title": "t"}}
+    body = json.dumps(payload).encode("utf-8")
+    r = client.post("/", data=body, headers={"Content-Type": "application/json", **hmac_header(body, "abc")})
+    assert r.status_code == 200
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert 'lp_jira_sync_stage_seconds_count{stage="hmac_verification"}' in r.text
+    assert 'lp_jira_sync_stage_seconds_count{stage="merge_project_config"}' in r.text
+    assert 'lp_jira_sync_webhooks_total{action="bug-created"}' in r.text
+    assert "lp_jira_sync_queue_depth 0" in r.text
+
+
+def test_post_rejects_oversized_and_unknown_payloads(monkeypatch):
+    main = build_app_with_secret(monkeypatch, secret="abc", max_body_bytes=64)
+    synced = []
+    monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: synced.append(args))
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
+    client = TestClient(main.app)
+
+    body = json.dumps({"action": "created", "bug": "/bugs/1", "new": {"title": "t" * 100}}).encode("utf-8")
+    r = client.post("/", data=body, headers={"Content-Type": "application/json", **hmac_header(body, "abc")})
+    assert r.status_code == 413
+
+    body = json.dumps({"action": "deleted", "bug": "/bugs/1", "new": {}}).encode("utf-8")
+    r = client.post("/", data=body, headers={"Content-Type": "application/json", **hmac_header(body, "abc")})
+    assert r.status_code == 422
+
+    # Changes of fields that are not synced are acknowledged without touching Jira
+    body = json.dumps({"action": "tags-changed", "bug": "/bugs/1", "new": {}}).encode("utf-8")
+    r = client.post("/", data=body, headers={"Content-Type": "application/json", **hmac_header(body, "abc")})
+    assert r.status_code == 200
+    assert synced == []
+
+
+def test_redelivered_webhook_returns_stored_response(monkeypatch, tmp_path):
+    main = build_app_with_secret(monkeypatch, secret="abc", state_db_path=str(tmp_path / "state.db"),
+                                 delivery_cache_persist=True)
+    synced = []
+    monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: synced.append(args))
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
+    client = TestClient(main.app)
+
+    body = json.dumps({"action": "created", "bug": "/bugs/1", "new": {"title": "t"}}).encode("utf-8")
+    headers = {"Content-Type": "application/json", "X-Launchpad-Delivery": "d-1", **hmac_header(body, "abc")}
+    first = client.post("/", data=body, headers=headers)
+    assert first.status_code == 200
+
+    # Survives a restart through the state database
+    main = importlib.reload(main)
+    monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: synced.append(args))
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
+    second = TestClient(main.app).post("/", data=body, headers=headers)
+    assert (second.status_code, second.json()) == (first.status_code, first.json())
+    assert len(synced) == 1
+
+    # Without a delivery id the same body is a new event, not a redelivery
+    del headers["X-Launchpad-Delivery"]
+    for _ in range(2):
+        assert TestClient(main.app).post("/", data=body, headers=headers).status_code == 200
+    assert len(synced) == 3
+
+
+def test_readyz_waits_for_warm_jira_client(monkeypatch):
+    main = build_app_with_secret(monkeypatch, secret="abc")
+    client = TestClient(main.app)
+
+    assert client.get("/healthz").status_code == 200
+    assert client.get("/readyz").status_code == 503
+
+    main.pool_warmer.ready.set()
+    assert client.get("/readyz").status_code == 200
+
+
+def test_readyz_waits_for_warm_async_jira_client(monkeypatch):
+    main = build_app_with_secret(monkeypatch, secret="abc", async_jira_client=True)
+    client = TestClient(main.app)
+    main.pool_warmer.ready.set()
+    assert client.get("/readyz").status_code == 503
+
+    main.async_client_warmer.ready.set()
+    assert client.get("/readyz").status_code == 200
+
+
+def test_post_is_rejected_fast_while_circuit_breaker_is_open(monkeypatch):
+    from lp_jira_sync_app.utils.circuit_breaker import CircuitBreaker
+
+    main = build_app_with_secret(monkeypatch, secret="abc")
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30)
+    breaker.record(False, 0.1)
+    monkeypatch.setattr(main, "jira_breaker", breaker)
+    synced = []
+    monkeypatch.setattr(main, "sync_launchpad_action", lambda *args: synced.append(args))
+    monkeypatch.setattr(main, "get_jira_client", lambda: None)
+    client = TestClient(main.app)
+
+    body = json.dumps({"action": "created", "bug": "/bugs/1", "new": {"title": "t"}}).encode("utf-8")
+    r = client.post("/", data=body, headers={"Content-Type": "application/json", **hmac_header(body, "abc")})
+    assert r.status_code == 503
+    assert r.headers.get("Retry-After") == "30"
+    assert synced == []
+
+
+def test_signature_of_a_streamed_body_matches_the_whole_body():
+    from lp_jira_sync_app.utils.security import new_hmac_sha1, verify_hmac_sha1
+
+    body = b'{"action": "created", "bug": "/bugs/1"}'
+    signature = hmac_header(body, "abc")["X-Hub-Signature"].split("=", 1)[1]
+    mac = new_hmac_sha1("abc")
+    for start in range(0, len(body), 8):
+        mac.update(body[start:start + 8])
+
+    assert verify_hmac_sha1(mac, signature, "abc") == verify_hmac_sha1(body, signature, "abc") == signature
+    assert verify_hmac_sha1(body, signature, "other") is None
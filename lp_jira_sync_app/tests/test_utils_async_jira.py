@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import lp_jira_sync_app.utils.async_jira as aj
+from lp_jira_sync_app.utils import config as cfg
+from lp_jira_sync_app.utils.launchpad_utils import sync_launchpad_action_async
+
+PROJECT_CONFIG = {"jira_project_key": "PRJ", "jira_issue_type": "Bug",
+                  "status_mapping": {"Confirmed": "In Progress"}}
+
+
+def fake_jira(requests, deployment_type="Server"):
+    """MockTransport for a project whose only workflow edge is To Do -> In Progress."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        requests.append((request.method, request.url.path, body))
+        path = request.url.path.removeprefix("/rest/api/2/")
+        if path == "serverInfo":
+            return httpx.Response(200, json={"deploymentType": deployment_type})
+        if path in ("search", "search/jql"):
+            return httpx.Response(200, json={"issues": []})
+        if path == "issue":
+            return httpx.Response(201, json={"id": "10001", "key": "PRJ-1"})
+        if path == "issue/PRJ-1" and request.method == "GET":
+            return httpx.Response(200, json={
+                "key": "PRJ-1",
+                "fields": {"status": {"name": "To Do"}, "project": {"key": "PRJ"}, "issuetype": {"name": "Bug"}},
+                "transitions": [{"id": "21", "to": {"name": "In Progress"}}]})
+        if path == "issue/PRJ-1/transitions":
+            return httpx.Response(204)
+        return httpx.Response(404, json={"errorMessages": ["not found"]})
+    return httpx.MockTransport(handler)
+
+
+def test_async_sync_creates_issue_and_transitions_it(monkeypatch):
+    monkeypatch.setitem(cfg.global_config, "app", {**(cfg.global_config.get("app") or {}),
+                                                   "launchpad_url": "https://launchpad.net", "state_db_path": ""})
+    aj.transition_graph.invalidate(("PRJ", "Bug"))
+    requests = []
+    payload = {"action": "created", "bug": "/bugs/7", "target": "/testproject",
+               "new": {"title": "Crash", "description": "", "reporter": "/~user1",
+                       "status": "Confirmed", "importance": "High"}}
+
+    async def run():
+        client = aj.AsyncJiraClient("https://jira.example.com", "user", "token", transport=fake_jira(requests))
+        try:
+            await sync_launchpad_action_async(payload, client, PROJECT_CONFIG)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+    assert [(method, path) for method, path, _ in requests] == [
+        ("GET", "/rest/api/2/serverInfo"),
+        ("POST", "/rest/api/2/search"),
+        ("POST", "/rest/api/2/issue"),
+        ("GET", "/rest/api/2/issue/PRJ-1"),
+        ("POST", "/rest/api/2/issue/PRJ-1/transitions"),
+    ]
+    assert requests[2][2]["fields"]["summary"] == "Crash"
+    assert requests[4][2] == {"transition": {"id": "21"}}
+
+
+def test_async_client_raises_jira_errors_with_status():
+    async def run():
+        client = aj.AsyncJiraClient("https://jira.example.com", "user", "token", transport=fake_jira([]))
+        try:
+            await client.issue("PRJ-404")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(aj.AsyncJiraError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 404
+
+
+def test_async_client_warmer_retries_until_jira_answers(monkeypatch):
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        return httpx.Response(503 if len(attempts) < 3 else 200, json={})
+
+    client = aj.AsyncJiraClient("https://jira.example.com", "user", "token", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(aj, "get_async_jira_client", lambda: client)
+    warmer = aj.AsyncClientWarmer(retry_interval=0.01)
+
+    async def run():
+        warmer.start()
+        await warmer._task
+        await client.aclose()
+
+    asyncio.run(run())
+    assert warmer.ready.is_set()
+    assert attempts == ["/rest/api/2/serverInfo"] * 3
+
+
+def test_async_client_picks_the_search_endpoint_from_the_deployment_type():
+    requests = []
+
+    async def run():
+        # A Cloud site on a custom domain
+        client = aj.AsyncJiraClient("https://jira.example.com", "user", "token",
+                                    transport=fake_jira(requests, deployment_type="Cloud"))
+        try:
+            await client.server_info()
+            await client.search_issues('project = "PRJ"', "status", expand="transitions")
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert [(method, path) for method, path, _ in requests] == [
+        ("GET", "/rest/api/2/serverInfo"), ("POST", "/rest/api/2/search/jql")]
+    assert requests[1][2]["expand"] == "transitions"
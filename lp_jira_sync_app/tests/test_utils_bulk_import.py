@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from lp_jira_sync_app.utils.bulk_import import BulkImporter
+from lp_jira_sync_app.utils.issue_index import IssueIndex
+from lp_jira_sync_app.utils.state_db import StateDB
+
+PROJECT_CONFIG = {"jira_project_key": "PRJ", "jira_issue_type": "Bug"}
+
+
+def bug(number):
+    return {"action": "created", "target": "/testproject", "bug": f"/bugs/{number}",
+            "new": {"title": f"Bug {number}", "description": "", "reporter": "/~user1",
+                    "status": "New", "importance": "Undecided"}}
+
+
+class BulkJira:
+    def __init__(self, fail_on_call=None, existing=(), rejected=()):
+        self.bulk_calls = []
+        self.fail_on_call = fail_on_call
+        self.next_key = 1
+        # Issues already in Jira, as (key, description)
+        self.existing = list(existing)
+        self.rejected = set(rejected)
+
+    def search_issues(self, jql, **kwargs):
+        return [SimpleNamespace(key=key, fields=SimpleNamespace(description=description))
+                for key, description in self.existing]
+
+    def create_issues(self, field_list, prefetch=True):
+        self.bulk_calls.append([fields["summary"] for fields in field_list])
+        if self.fail_on_call == len(self.bulk_calls):
+            raise RuntimeError("connection lost")
+        results = []
+        for fields in field_list:
+            if fields["summary"] in self.rejected:
+                results.append({"status": "Error", "error": "priority is required", "issue": None})
+                continue
+            results.append({"status": "Success", "issue": SimpleNamespace(key=f"PRJ-{self.next_key}")})
+            self.next_key += 1
+        return results
+
+
+def test_bulk_import_skips_synced_bugs_and_resumes_from_checkpoint(tmp_path):
+    export = tmp_path / "bugs.jsonl"
+    export.write_text("\n".join(json.dumps(bug(n)) for n in range(1, 6)) + "\n")
+    db = StateDB(str(tmp_path / "state.db"))
+    IssueIndex(db).put("https://launchpad.net/testproject/+bug/2", "PRJ", "PRJ-100")
+
+    jira = BulkJira(fail_on_call=2)
+    importer = BulkImporter(jira, db, PROJECT_CONFIG, "bugs", chunk_size=2)
+    with pytest.raises(RuntimeError):
+        importer.run(str(export))
+    assert jira.bulk_calls == [["Bug 1"], ["Bug 3", "Bug 4"]]
+
+    jira.fail_on_call = None
+    stats = BulkImporter(jira, db, PROJECT_CONFIG, "bugs", chunk_size=2).run(str(export))
+    # Lines 1-2 were checkpointed, so only the interrupted chunk and the rest are sent again
+    assert jira.bulk_calls[2:] == [["Bug 3", "Bug 4"], ["Bug 5"]]
+    assert stats == {"created": 3, "skipped": 0, "failed": 0, "not_transitioned": 0}
+    assert IssueIndex(db).get("https://launchpad.net/testproject/+bug/5", "PRJ") == "PRJ-4"
+
+
+def test_bulk_import_finds_unindexed_issues_and_retries_failed_lines(tmp_path):
+    export = tmp_path / "bugs.jsonl"
+    export.write_text("\n".join(json.dumps(bug(n)) for n in range(1, 5)) + "\n")
+    db = StateDB(str(tmp_path / "state.db"))
+    # Bug 1 was synced before the index existed
+    jira = BulkJira(existing=[("PRJ-50", "This issue was created from Launchpad issue "
+                                         "https://launchpad.net/testproject/+bug/1\n")], rejected={"Bug 3"})
+
+    stats = BulkImporter(jira, db, PROJECT_CONFIG, "bugs", chunk_size=2).run(str(export))
+    assert jira.bulk_calls == [["Bug 2"], ["Bug 3", "Bug 4"]]
+    assert stats == {"created": 2, "skipped": 1, "failed": 1, "not_transitioned": 0}
+    assert IssueIndex(db).get("https://launchpad.net/testproject/+bug/1", "PRJ") == "PRJ-50"
+
+    # The next run only retries the line that failed
+    jira.rejected = set()
+    stats = BulkImporter(jira, db, PROJECT_CONFIG, "bugs", chunk_size=2).run(str(export))
+    assert jira.bulk_calls[2:] == [["Bug 3"]]
+    assert stats["created"] == 1 and db.get_value("bulk-import:bugs:failed") == "[]"
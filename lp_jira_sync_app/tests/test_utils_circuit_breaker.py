@@ -0,0 +1,31 @@
+from lp_jira_sync_app.utils import circuit_breaker as cb
+
+
+def test_breaker_opens_on_failures_and_recovers_through_a_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cb.time, "monotonic", lambda: now[0])
+    breaker = cb.CircuitBreaker(failure_rate=0.5, slow_call_seconds=5, window_size=4, min_calls=4,
+                                open_seconds=30, half_open_probes=1)
+
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.allow()
+    # A slow answer counts as a failure: 2 of 4 calls failed
+    breaker.record(True, 6)
+    assert breaker.state == cb.OPEN and breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30 and breaker.open_delay() == 30
+
+    now[0] += 30
+    assert breaker.open_delay() is None
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == cb.OPEN and breaker.trips == 2
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == cb.CLOSED
+    assert breaker.allow() and breaker.allow()
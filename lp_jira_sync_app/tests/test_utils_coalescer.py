@@ -0,0 +1,37 @@
+import threading
+
+from lp_jira_sync_app.utils.coalescer import ChangeCoalescer
+
+
+def change(action, **new):
+    return {"action": action, "bug": "/bugs/1", "target": "/testproject", "new": new}
+
+
+def test_changes_for_one_bug_are_flushed_together():
+    flushed = []
+    done = threading.Event()
+
+    def flush(payload, fields, project_config, outbox_ids):
+        flushed.append((payload, fields))
+        done.set()
+
+    coalescer = ChangeCoalescer(flush)
+    coalescer.add("bug-1", change("status-changed", status="Triaged", title="t"), {}, 0.2, 5)
+    coalescer.add("bug-1", change("importance-changed", status="Triaged", importance="High"), {}, 0.2, 5)
+    coalescer.add("bug-1", change("status-changed", status="In Progress"), {}, 0.2, 5)
+
+    assert done.wait(5)
+    assert len(flushed) == 1
+    payload, fields = flushed[0]
+    assert fields == {"status", "importance"}
+    assert payload["new"] == {"status": "In Progress", "title": "t", "importance": "High"}
+    assert coalescer.pending_count() == 0
+
+
+def test_flush_all_applies_pending_changes_immediately():
+    flushed = []
+    coalescer = ChangeCoalescer(lambda payload, fields, config, outbox_ids: flushed.append(fields))
+    coalescer.add("bug-1", change("title-changed", title="t"), {}, 60, 120)
+
+    coalescer.flush_all()
+    assert flushed == [{"title"}]
@@ -0,0 +1,54 @@
+import base64
+
+import pytest
+
+from lp_jira_sync_app.utils import config as cfg
+
+
+def encode(text: str) -> str:
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def test_project_config_is_cached_and_read_only(monkeypatch):
+    monkeypatch.setitem(cfg.global_config, "project", {"jira_project_key": "PRJ", "status_mapping": {"New": "To Do"}})
+    cache = cfg.ProjectConfigCache(maxsize=2)
+    yaml_param = encode("project:\n  jira_project_key: OTHER\n")
+
+    first = cache.get(yaml_param)
+    assert first["jira_project_key"] == "OTHER"
+    assert first["status_mapping"]["New"] == "To Do"
+    assert cache.get(yaml_param) is first
+    assert cache.info()["hits"] == 1 and cache.info()["misses"] == 1
+
+    with pytest.raises(TypeError):
+        first["status_mapping"]["New"] = "Done"
+
+
+def test_invalid_project_config_is_negatively_cached(monkeypatch):
+    monkeypatch.setitem(cfg.global_config, "project", {"jira_project_key": "PRJ"})
+    cache = cfg.ProjectConfigCache()
+    calls = {"decode": 0}
+    decode = cfg.decode_base64_yaml
+
+    def counting_decode(value):
+        calls["decode"] += 1
+        return decode(value)
+
+    monkeypatch.setattr(cfg, "decode_base64_yaml", counting_decode)
+    bad_mapping = encode("project:\n  status_mapping: [New]\n")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get(bad_mapping)
+        with pytest.raises(ValueError):
+            cache.get("not base64!")
+    assert calls["decode"] == 2
+    assert cache.info()["hits"] == 2
+
+
+def test_coalescing_is_only_enabled_with_the_outbox(monkeypatch):
+    monkeypatch.setitem(cfg.global_config, "project", {"jira_project_key": "PRJ", "coalesce_window_seconds": 5})
+    monkeypatch.setitem(cfg.global_config, "app", {"async_processing": True, "state_db_path": "state.db"})
+    assert cfg.build_project_config(None)["coalesce_window_seconds"] == 0
+
+    monkeypatch.setitem(cfg.global_config["app"], "outbox_enabled", True)
+    assert cfg.build_project_config(None)["coalesce_window_seconds"] == 5
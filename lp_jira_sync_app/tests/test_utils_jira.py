@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+import lp_jira_sync_app.utils.jira_utils as ju
+from lp_jira_sync_app.utils import config as cfg
+
+BUG_URL = "https://launchpad.net/testproject/+bug/12"
+
+
+def make_issue(key, description):
+    return SimpleNamespace(key=key, fields=SimpleNamespace(description=description))
+
+
+class FakeJira:
+    def __init__(self, search_results):
+        self.search_results = search_results
+        self.calls = {"search": 0, "issue": 0}
+        self.requested_fields = []
+
+    def search_issues(self, jql, **kwargs):
+        self.calls["search"] += 1
+        self.requested_fields.append(kwargs.get("fields"))
+        return self.search_results
+
+    def issue(self, key, **kwargs):
+        self.calls["issue"] += 1
+        self.requested_fields.append(kwargs.get("fields"))
+        return make_issue(key, "")
+
+
+def use_state_db(monkeypatch, tmp_path):
+    app_config = dict(cfg.global_config.get("app") or {})
+    app_config["state_db_path"] = str(tmp_path / "state.db")
+    monkeypatch.setitem(cfg.global_config, "app", app_config)
+
+
+def test_find_jira_issue_skips_longer_bug_urls_and_uses_index(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+    jira = FakeJira([
+        make_issue("PRJ-2", f"This issue was created from Launchpad issue {BUG_URL}3\n"),
+        make_issue("PRJ-1", f"This issue was created from Launchpad issue {BUG_URL}\n"),
+    ])
+
+    issue = ju.find_jira_issue(jira, "PRJ", BUG_URL)
+    assert issue.key == "PRJ-1"
+    assert jira.calls == {"search": 1, "issue": 0}
+
+    # Second lookup is answered from the index without a JQL search
+    issue = ju.find_jira_issue(jira, "PRJ", BUG_URL)
+    assert issue.key == "PRJ-1"
+    assert jira.calls == {"search": 1, "issue": 1}
+    # Neither call asked for comments or every field
+    assert all(fields and "comment" not in fields for fields in jira.requested_fields)
+
+
+def test_find_jira_issue_without_exact_match_returns_none(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+    jira = FakeJira([make_issue("PRJ-2", f"This issue was created from Launchpad issue {BUG_URL}3\n")])
+
+    assert ju.find_jira_issue(jira, "PRJ", BUG_URL) is None
+
+
+def test_find_jira_issue_remembers_missing_issue_until_one_is_created(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+    jira = FakeJira([])
+    jira.create_issue = lambda fields, prefetch: make_issue("PRJ-3", fields["description"])
+    bug_object = {"bug": "/bugs/12", "target": "/testproject",
+                  "new": {"title": "Crash", "description": "", "reporter": "/~user1"}}
+
+    assert ju.find_jira_issue(jira, "PRJ", BUG_URL) is None
+    # Repeat events of a bug without an issue don't search again
+    assert ju.find_jira_issue(jira, "PRJ", BUG_URL) is None
+    assert jira.calls == {"search": 1, "issue": 0}
+
+    ju.create_jira_issue(jira, bug_object, {"jira_project_key": "PRJ", "jira_issue_type": "Bug"})
+    assert ju.find_jira_issue(jira, "PRJ", BUG_URL).key == "PRJ-3"
+    assert jira.calls == {"search": 1, "issue": 1}
+
+
+def test_find_jira_comment_scans_comments_once_then_uses_index(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+    launchpad_url = cfg.global_config["app"]["launchpad_url"]
+    calls = {"comments": 0}
+
+    class CommentJira:
+        def comments(self, issue_key):
+            calls["comments"] += 1
+            body = f"Launchpad comment URL:\n{launchpad_url}/bugs/12/comments/1\nLaunchpad user x is commented:"
+            return [SimpleNamespace(body=body)]
+
+        def add_comment(self, issue, body):
+            pass
+
+    jira = CommentJira()
+    issue = make_issue("PRJ-1", "")
+
+    assert ju.find_jira_comment(jira, issue, "/bugs/12/comments/1")
+    assert not ju.find_jira_comment(jira, issue, "/bugs/12/comments/2")
+    assert calls["comments"] == 1
+
+    ju.create_jira_comment(jira, issue, {
+        "bug_comment": "/bugs/12/comments/2",
+        "new": {"commenter": "/~user1", "content": "hello"},
+    })
+    assert ju.find_jira_comment(jira, issue, "/bugs/12/comments/2")
+    assert calls["comments"] == 1
+
+
+def test_update_edits_with_one_put_and_comments_come_with_the_issue(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+    puts = []
+    jira = FakeJira([])
+    jira._session = SimpleNamespace(put=lambda url, data: puts.append((url, data)))
+    jira._get_url = lambda path: f"https://jira.example.com/rest/api/2/{path}"
+    ju.get_issue_index().put(BUG_URL, "PRJ", "PRJ-1")
+    monkeypatch.setattr(ju, "get_comment_index", lambda: None)
+
+    issue = ju.find_jira_issue(jira, "PRJ", BUG_URL, with_comments=True)
+    issue.fields.comment = SimpleNamespace(comments=[SimpleNamespace(body="see /bugs/12/comments/1")])
+    assert ju.find_jira_comment(jira, issue, "/bugs/12/comments/1")
+    assert jira.requested_fields == [ju.ISSUE_FIELDS + ",comment"]
+
+    ju.update_jira_issue(jira, issue, {"action": "title-changed", "bug": "/bugs/12", "target": "/testproject",
+                                       "new": {"title": "New title"}}, {})
+    assert puts == [("https://jira.example.com/rest/api/2/issue/PRJ-1", '{"fields": {"summary": "New title"}}')]
+    assert jira.calls == {"search": 0, "issue": 1}
+
+
+def test_client_internals_used_for_edits_exist_in_the_pinned_jira(monkeypatch):
+    from jira import JIRA
+
+    client = JIRA(server="https://jira.example.com", basic_auth=("user", "token"), get_server_info=False)
+    puts = []
+    monkeypatch.setattr(client._session, "put", lambda url, data: puts.append((url, data)))
+
+    ju.edit_issue_fields(client, "PRJ-1", {"summary": "New title"})
+    assert puts == [("https://jira.example.com/rest/api/2/issue/PRJ-1", '{"fields": {"summary": "New title"}}')]
+    assert ju.is_cloud(client) is False
+
+
+def test_new_issue_is_comment_indexed_without_fetching_comments(monkeypatch, tmp_path):
+    use_state_db(monkeypatch, tmp_path)
+
+    class CreateJira:
+        def create_issue(self, fields, prefetch=True):
+            return SimpleNamespace(key="PRJ-7")
+
+        def comments(self, issue_key):
+            raise AssertionError("a new issue has no comments to scan")
+
+    jira = CreateJira()
+    payload = {"target": "/testproject", "bug": "/bugs/12",
+               "new": {"title": "t", "description": "", "reporter": "/~user1", "status": "New"}}
+    issue = ju.create_jira_issue(jira, payload, {"jira_project_key": "PRJ", "jira_issue_type": "Bug"})
+
+    assert not ju.find_jira_comment(jira, issue, "/bugs/12/comments/1")
@@ -0,0 +1,67 @@
+import lp_jira_sync_app.utils.jira_clients as jc
+
+
+class FakeSession:
+    def __init__(self):
+        self.mounted = {}
+
+    def mount(self, prefix, adapter):
+        self.mounted[prefix] = adapter
+
+
+class FakeJira:
+    def __init__(self):
+        self._session = FakeSession()
+
+
+def test_client_is_built_once_and_rebuilt_after_invalidate(monkeypatch):
+    calls = {"build": 0}
+
+    def build_jira_client():
+        calls["build"] += 1
+        return FakeJira()
+
+    monkeypatch.setattr(jc, "build_jira_client", build_jira_client)
+    pool = jc.JiraClientPool()
+
+    first = pool.get()
+    assert pool.get() is first
+    assert calls["build"] == 1
+    assert "https://" in first._session.mounted
+
+    # Invalidating a stale instance must not drop a newer one
+    pool.invalidate(object())
+    assert pool.get() is first
+
+    pool.invalidate(first)
+    second = pool.get()
+    assert second is not first
+    assert calls["build"] == 2
+
+
+def test_pool_warmer_retries_until_jira_answers():
+    class FlakyPool:
+        attempts = 0
+
+        def warm(self):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise RuntimeError("jira unavailable")
+
+    pool = FlakyPool()
+    warmer = jc.PoolWarmer(pool, retry_interval=0.01)
+    warmer.start()
+    assert warmer.ready.wait(2)
+    assert pool.attempts == 3
+    assert warmer.seconds is not None
+
+
+def test_only_broken_sessions_rebuild_the_client():
+    from jira import JIRAError
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+
+    assert jc.is_client_failure(JIRAError(status_code=401, text="unauthorized"))
+    assert jc.is_client_failure(RequestsConnectionError("connection reset"))
+    # Permission errors on one issue keep the pooled client
+    assert not jc.is_client_failure(JIRAError(status_code=403, text="forbidden"))
+    assert not jc.is_client_failure(JIRAError(status_code=404, text="not found"))
@@ -50,7 +50,7 @@ def test_handle_create_bug_lp_event(monkeypatch):
     payload = CREATE_BUG_PAYLOAD
     jira_client = object()
     calls = {"find": 0, "create": 0}
-    def find_jira_issue(jira_client, project_key, bug_path):
+    def find_jira_issue(jira_client, project_key, bug_path, with_comments=False):
         calls["find"] += 1
         return None
     def create_jira_issue(jira_client, payload, project_config):
@@ -65,7 +65,7 @@ def test_handle_create_bug_lp_event(monkeypatch):
 
     ###Handle issue already exists in jira
 
-    def find_jira_issue(jira_client, project_key, bug_path):
+    def find_jira_issue(jira_client, project_key, bug_path, with_comments=False):
         calls["find"] += 1
         return object()
     monkeypatch.setattr(lu, "find_jira_issue", find_jira_issue)
@@ -84,7 +84,7 @@ def test_handle_update_bug_lp_event(monkeypatch):
         calls["find"] += 1
         return object()
 
-    def update_jira_issue(jira_client, payload, project_config):
+    def update_jira_issue(jira_client, issue, payload, project_config):
         calls["update"] += 1
         return object()
 
@@ -105,3 +105,71 @@ def test_handle_update_bug_lp_event(monkeypatch):
     assert calls["update"] == 1
     assert calls["find"] == 2
     assert e.value.status_code == 404
+
+def test_coalesced_changes_leave_the_outbox_only_once_flushed(monkeypatch, tmp_path):
+    from jira import JIRAError
+    from lp_jira_sync_app.utils.coalescer import ChangeCoalescer
+    from lp_jira_sync_app.utils.outbox import Outbox
+    from lp_jira_sync_app.utils.state_db import StateDB
+
+    outbox = Outbox(StateDB(str(tmp_path / "state.db")))
+    coalescer = ChangeCoalescer(lu.flush_coalesced_changes)
+    updates = []
+    monkeypatch.setattr(lu, "get_outbox", lambda: outbox)
+    monkeypatch.setattr(lu, "change_coalescer", coalescer)
+    monkeypatch.setattr(lu, "jira_breaker", None)
+    monkeypatch.setattr(lu, "get_jira_client", lambda: object())
+    monkeypatch.setattr(lu, "find_jira_issue", lambda jira_client, project_key, bug_url: object())
+
+    def failing_update(jira_client, issue, payload, project_config, changed_fields):
+        raise JIRAError(status_code=503, text="unavailable")
+
+    monkeypatch.setattr(lu, "update_jira_issue", failing_update)
+    project_config = {"jira_project_key": "PRJ", "coalesce_window_seconds": 60}
+    status_change = {**UPDATE_BUG_PAYLOAD, "action": "status-changed"}
+    ids = [outbox.add(payload, project_config) for payload in (UPDATE_BUG_PAYLOAD, status_change)]
+    for payload, outbox_id in zip((UPDATE_BUG_PAYLOAD, status_change), ids):
+        lu.process_launchpad_event(payload, project_config, outbox_id)
+
+    # Both changes wait in the coalescer and are not completed yet
+    assert coalescer.pending_count() == 1 and outbox.pending_count() == 2
+
+    coalescer.flush_all()
+    attempts = outbox._db.execute("SELECT attempts FROM outbox ORDER BY id").fetchall()
+    assert attempts == [(1,), (1,)]
+
+    monkeypatch.setattr(lu, "update_jira_issue", lambda jira_client, issue, payload, project_config,
+                        changed_fields: updates.append(changed_fields))
+    outbox._db.execute("UPDATE outbox SET next_attempt_at = 0")
+    for outbox_id, payload, config in outbox.claim_due():
+        lu.process_launchpad_event(payload, config, outbox_id)
+    coalescer.flush_all()
+    assert updates == [{"title"}] and outbox.pending_count() == 1
+
+
+def test_coalesced_changes_wait_for_an_open_breaker_without_outbox(monkeypatch):
+    from lp_jira_sync_app.utils.circuit_breaker import CircuitBreaker
+    from lp_jira_sync_app.utils.coalescer import ChangeCoalescer
+
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30)
+    breaker.record(False, 0.1)
+    coalescer = ChangeCoalescer(lu.flush_coalesced_changes)
+    updates = []
+    monkeypatch.setattr(lu, "change_coalescer", coalescer)
+    monkeypatch.setattr(lu, "jira_breaker", breaker)
+    monkeypatch.setattr(lu, "get_jira_client", lambda: object())
+    monkeypatch.setattr(lu, "find_jira_issue", lambda jira_client, project_key, bug_url: object())
+    monkeypatch.setattr(lu, "update_jira_issue", lambda jira_client, issue, payload, project_config,
+                        changed_fields: updates.append((payload["new"]["title"], changed_fields)))
+    project_config = {"jira_project_key": "PRJ"}
+
+    lu.flush_coalesced_changes(UPDATE_BUG_PAYLOAD, {"title"}, project_config)
+    # Kept for later instead of dropped; a newer change joins it
+    assert coalescer.pending_count() == 1 and updates == []
+    coalescer.add(("PRJ", lu.launchpad_bug_url(UPDATE_BUG_PAYLOAD)),
+                  {**UPDATE_BUG_PAYLOAD, "action": "status-changed", "new": {"status": "Fix Released"}},
+                  project_config, 60, 120)
+
+    monkeypatch.setattr(lu, "jira_breaker", None)
+    coalescer.flush_all()
+    assert updates == [("newbugtest new title", {"title", "status"})]
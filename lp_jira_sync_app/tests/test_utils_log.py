@@ -0,0 +1,39 @@
+import json
+import logging
+
+from lp_jira_sync_app.utils.log import JsonFormatter, RepeatFilter, summarize_payload
+
+
+def record(message, level=logging.ERROR, **extra):
+    entry = logging.makeLogRecord({"name": "test", "levelno": level, "levelname": logging.getLevelName(level),
+                                   "msg": message})
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_json_formatter_truncates_long_values():
+    payload = {"action": "created", "bug": "/bugs/1", "new": {"description": "x" * 10000}}
+    line = JsonFormatter(max_field_chars=20).format(
+        record("y" * 50, payload=summarize_payload(payload), detail="z" * 30))
+    entry = json.loads(line)
+
+    assert entry["message"] == "y" * 20 + "... (30 more chars)"
+    assert entry["detail"] == "z" * 20 + "... (10 more chars)"
+    assert entry["payload"] == {"action": "created", "bug": "/bugs/1", "new_fields": ["description"]}
+
+
+def test_repeat_filter_drops_identical_errors_within_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("lp_jira_sync_app.utils.log.time.monotonic", lambda: now[0])
+    repeat = RepeatFilter(interval=60)
+
+    assert repeat.filter(record("Jira is down"))
+    assert not repeat.filter(record("Jira is down"))
+    assert not repeat.filter(record("Jira is down"))
+    assert repeat.filter(record("Another error"))
+    assert repeat.filter(record("Jira is down", level=logging.INFO))
+
+    now[0] += 61
+    passed = record("Jira is down")
+    assert repeat.filter(passed)
+    assert passed.suppressed == 2
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from lp_jira_sync_app.utils import jira_utils
+from lp_jira_sync_app.utils.lookup_batcher import LookupBatcher, AsyncLookupBatcher
+from lp_jira_sync_app.utils.jira_utils import search_jira_issues
+
+BUG_URL = "https://launchpad.net/testproject/+bug/"
+
+
+def test_concurrent_lookups_share_one_search():
+    batcher = LookupBatcher(window=1.0, max_size=3)
+    searches = []
+    results = {}
+
+    def search(bug_urls):
+        searches.append(list(bug_urls))
+        return {bug_url: f"issue of {bug_url}" for bug_url in bug_urls}
+
+    def lookup(bug_url):
+        results[bug_url] = batcher.lookup("PRJ", bug_url, search)
+
+    threads = [threading.Thread(target=lookup, args=(f"{BUG_URL}{n}",)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # The batch was full before the window ended
+    assert len(searches) == 1 and sorted(searches[0]) == [f"{BUG_URL}{n}" for n in range(3)]
+    assert results == {f"{BUG_URL}{n}": f"issue of {BUG_URL}{n}" for n in range(3)}
+
+
+def test_async_lookups_share_one_search_and_its_error():
+    batcher = AsyncLookupBatcher(window=0.01, max_size=10)
+    searches = []
+
+    async def search(bug_urls):
+        searches.append(list(bug_urls))
+        raise RuntimeError("Jira is down")
+
+    async def run():
+        return await asyncio.gather(*(batcher.lookup("PRJ", f"{BUG_URL}{n}", search) for n in range(2)),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(run())
+
+    assert searches == [[f"{BUG_URL}0", f"{BUG_URL}1"]]
+    assert [str(error) for error in errors] == ["Jira is down", "Jira is down"]
+
+
+def test_search_matches_each_bug_exactly_in_one_query():
+    def issue(key, bug_url):
+        return SimpleNamespace(key=key, fields=SimpleNamespace(
+            description=f"This issue was created from Launchpad issue {bug_url}\n"))
+
+    class FakeJira:
+        def __init__(self):
+            self.jql = []
+
+        def search_issues(self, jql, **kwargs):
+            self.jql.append(jql)
+            return [issue("PRJ-3", f"{BUG_URL}123"), issue("PRJ-2", f"{BUG_URL}12"), issue("PRJ-1", f"{BUG_URL}5")]
+
+    jira = FakeJira()
+    found = search_jira_issues(jira, "PRJ", [f"{BUG_URL}12", f"{BUG_URL}5", f"{BUG_URL}7"])
+
+    assert {bug_url: issue and issue.key for bug_url, issue in found.items()} == {
+        f"{BUG_URL}12": "PRJ-2", f"{BUG_URL}5": "PRJ-1", f"{BUG_URL}7": None}
+    assert jira.jql == [f'project = "PRJ" AND (text ~ "{BUG_URL}12" OR text ~ "{BUG_URL}5" '
+                        f'OR text ~ "{BUG_URL}7") ORDER BY created DESC']
+
+
+def test_lookups_on_the_event_loop_are_not_batched(monkeypatch):
+    class NoBatching:
+        def lookup(self, *args):
+            raise AssertionError("waiting for a batch would block the event loop")
+
+    class FakeJira:
+        def search_issues(self, jql, **kwargs):
+            return []
+
+    monkeypatch.setattr(jira_utils, "LOOKUP_BATCH_WINDOW", 0.005)
+    monkeypatch.setattr(jira_utils, "lookup_batcher", NoBatching())
+    monkeypatch.setattr(jira_utils, "get_issue_index", lambda: None)
+
+    async def handler():
+        # A synchronous sync_launchpad_action called from a request handler
+        return jira_utils.find_jira_issue(FakeJira(), "PRJ", f"{BUG_URL}1")
+
+    assert asyncio.run(handler()) is None
@@ -0,0 +1,21 @@
+from lp_jira_sync_app.utils.metrics import Histogram, jira_operation
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, "find")
+    histogram.observe(0.5, "find")
+    histogram.observe(5, "find")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="find",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="find",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="find",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="find"} 3' in lines
+    assert histogram.count("find") == 3
+
+
+def test_jira_operation_drops_issue_keys():
+    assert jira_operation("GET", "https://x.atlassian.net/rest/api/2/issue/PRJ-12/transitions") == \
+        "GET issue/transitions"
+    assert jira_operation("POST", "https://x.atlassian.net/rest/api/3/search/jql") == "POST search/jql"
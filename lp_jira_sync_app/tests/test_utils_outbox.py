@@ -0,0 +1,64 @@
+import time
+from types import SimpleNamespace
+
+from jira import JIRAError
+
+from lp_jira_sync_app.utils.outbox import Outbox, OutboxPoller, PENDING
+from lp_jira_sync_app.utils.rate_limit import TokenBucket
+from lp_jira_sync_app.utils.state_db import StateDB
+
+
+def throttled(retry_after="120"):
+    return JIRAError(status_code=429, text="throttled",
+                     response=SimpleNamespace(headers={"Retry-After": retry_after}, text="throttled"))
+
+
+def test_failed_event_is_retried_after_retry_after_and_blocks_its_bug(tmp_path):
+    outbox = Outbox(StateDB(str(tmp_path / "state.db")))
+    first = outbox.add({"bug": "/bugs/1", "action": "created"}, {"jira_project_key": "PRJ"})
+    second = outbox.add({"bug": "/bugs/1", "action": "title-changed"}, {"jira_project_key": "PRJ"})
+
+    delay = outbox.fail(first, throttled())
+    assert delay >= 120
+    # The newer event of the same bug must wait for the retry
+    assert outbox.has_earlier(second)
+    outbox.defer(second)
+    assert outbox.claim_due() == []
+
+    outbox._db.execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (first,))
+    claimed = outbox.claim_due()
+    assert [entry[0] for entry in claimed] == [first]
+    assert claimed[0][2]["jira_project_key"] == "PRJ"
+
+    outbox.complete(first)
+    assert [entry[0] for entry in outbox.claim_due()] == [second]
+
+
+def test_event_parked_without_delay_is_handed_to_the_poller(tmp_path):
+    outbox = Outbox(StateDB(str(tmp_path / "state.db")))
+    entry = outbox.add({"bug": "/bugs/3", "action": "created"}, {}, delay=0.0, state=PENDING)
+    assert [claimed[0] for claimed in outbox.claim_due()] == [entry]
+
+
+def test_permanent_failure_goes_to_dead_letters_and_can_be_replayed(tmp_path):
+    outbox = Outbox(StateDB(str(tmp_path / "state.db")))
+    entry = outbox.add({"bug": "/bugs/2", "action": "created"}, {})
+
+    assert outbox.fail(entry, JIRAError(status_code=400, text="bad request")) is None
+    assert outbox.pending_count() == 0
+    assert [letter["id"] for letter in outbox.dead_letters()] == [entry]
+
+    assert outbox.replay_dead_letters() == 1
+    submitted = []
+    poller = OutboxPoller(outbox, lambda *args: submitted.append(args) or True)
+    assert poller.poll_once() == 1
+    assert submitted[0][2] == entry
+    assert outbox.dead_letters() == []
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,122 @@
+import json
+from types import SimpleNamespace
+
+from jira import JIRAError
+
+from lp_jira_sync_app.utils.issue_index import IssueIndex
+from lp_jira_sync_app.utils.reconcile import Reconciler
+from lp_jira_sync_app.utils.state_db import StateDB
+
+PROJECT_CONFIG = {"jira_project_key": "PRJ", "jira_issue_type": "Bug",
+                  "severity_mapping": {"High": "High"}}
+
+
+def bug(number, title, updated):
+    return {"target": "/testproject", "bug": f"/bugs/{number}", "date_last_updated": updated,
+            "new": {"title": title, "description": "", "reporter": "/~user1",
+                    "status": "New", "importance": "High"}}
+
+
+class DriftedIssue:
+    def __init__(self, key, summary, priority, description=""):
+        self.key = key
+        self.fields = SimpleNamespace(summary=summary, priority=SimpleNamespace(name=priority),
+                                      status=SimpleNamespace(name="To Do"), description=description)
+        self.edits = []
+
+
+class SearchJira:
+    def __init__(self, issues, moved=None):
+        self.issues = {issue.key: issue for issue in issues}
+        # Old key -> key of the moved issue
+        self.moved = dict(moved or {})
+        self.searches = []
+        self._session = SimpleNamespace(put=self._put, hooks={"response": []})
+
+    @staticmethod
+    def _get_url(path):
+        return f"https://jira.example.com/rest/api/2/{path}"
+
+    def _put(self, url, data):
+        self.issues[url.rsplit("/", 1)[-1]].edits.append(json.loads(data)["fields"])
+
+    def search_issues(self, jql, maxResults=50, fields=None, validate_query=True):
+        self.searches.append(jql)
+        for hook in self._session.hooks["response"]:
+            hook(None)
+        keys = [self.moved.get(key, key) for key in jql[len("key in ("):-1].split(",")]
+        unknown = [key for key in keys if key not in self.issues]
+        if unknown and validate_query:
+            # Like Jira Server, a strict query fails as a whole
+            raise JIRAError(status_code=400, text=f"An issue with key '{unknown[0]}' does not exist for field 'key'.")
+        return [self.issues[key] for key in keys if key in self.issues]
+
+
+def test_reconcile_repairs_only_drifted_fields_since_high_water_mark(tmp_path):
+    db = StateDB(str(tmp_path / "state.db"))
+    index = IssueIndex(db)
+    for number in (1, 2, 3):
+        index.put(f"https://launchpad.net/testproject/+bug/{number}", "PRJ", f"PRJ-{number}")
+    issues = [DriftedIssue("PRJ-1", "Old title", "High"),
+              DriftedIssue("PRJ-2", "Bug 2", "High"),
+              DriftedIssue("PRJ-3", "Bug 3", "Low")]
+    jira = SearchJira(issues)
+    snapshot = [bug(1, "New title", "2024-01-02T00:00:00"),
+                bug(2, "Bug 2", "2024-01-03T00:00:00"),
+                bug(3, "Bug 3", "2024-01-01T00:00:00"),
+                bug(4, "Never synced", "2024-01-04T00:00:00")]
+
+    stats = Reconciler(jira, db, PROJECT_CONFIG).run(snapshot)
+
+    assert jira.searches == ["key in (PRJ-1,PRJ-2,PRJ-3)"]
+    assert issues[0].edits == [{"summary": "New title"}]
+    assert issues[1].edits == []
+    assert issues[2].edits == [{"priority": {"name": "High"}}]
+    assert stats["repaired"] == 2 and stats["unsynced"] == 1
+
+    # Nothing changed in Launchpad since the last run, so Jira is not queried again
+    snapshot.append(bug(2, "Bug 2 renamed", "2024-01-05T00:00:00"))
+    Reconciler(jira, db, PROJECT_CONFIG).run(snapshot)
+    assert jira.searches[1:] == ["key in (PRJ-2)"]
+    assert issues[1].edits == [{"summary": "Bug 2 renamed"}]
+
+
+def test_reconcile_resumes_within_bugs_updated_at_the_same_time(tmp_path):
+    db = StateDB(str(tmp_path / "state.db"))
+    index = IssueIndex(db)
+    for number in (1, 2, 3):
+        index.put(f"https://launchpad.net/testproject/+bug/{number}", "PRJ", f"PRJ-{number}")
+    issues = [DriftedIssue(f"PRJ-{number}", "Old title", "High") for number in (1, 2, 3)]
+    jira = SearchJira(issues)
+    # One instant written three ways
+    snapshot = [bug(1, "Bug 1", "2024-01-02T01:00:00+01:00"),
+                bug(2, "Bug 2", "2024-01-02T00:00:00Z"),
+                bug(3, "Bug 3", "2024-01-02T00:00:00.000000")]
+
+    # Each run's budget covers one bug
+    for _ in range(3):
+        stats = Reconciler(jira, db, PROJECT_CONFIG, max_api_calls=2, batch_size=1).run(snapshot)
+        assert stats["repaired"] == 1
+
+    assert [issue.edits for issue in issues] == [[{"summary": f"Bug {n}"}] for n in (1, 2, 3)]
+    stats = Reconciler(jira, db, PROJECT_CONFIG).run(snapshot)
+    assert stats["checked"] == 0
+
+
+def test_reconcile_survives_deleted_issues_and_follows_moved_ones(tmp_path):
+    db = StateDB(str(tmp_path / "state.db"))
+    index = IssueIndex(db)
+    for number in (1, 2, 3):
+        index.put(f"https://launchpad.net/testproject/+bug/{number}", "PRJ", f"PRJ-{number}")
+    moved = DriftedIssue("OTHER-7", "Old title", "High",
+                         "This issue was created from Launchpad issue https://launchpad.net/testproject/+bug/2\n")
+    kept = DriftedIssue("PRJ-3", "Bug 3", "High")
+    # PRJ-1 was deleted and PRJ-2 moved to another project
+    jira = SearchJira([moved, kept], moved={"PRJ-2": "OTHER-7"})
+    snapshot = [bug(number, f"Bug {number}", "2024-01-02T00:00:00") for number in (1, 2, 3)]
+
+    stats = Reconciler(jira, db, PROJECT_CONFIG).run(snapshot)
+
+    assert stats["missing"] == 1 and stats["checked"] == 2 and stats["repaired"] == 1
+    assert moved.edits == [{"summary": "Bug 2"}]
+    assert index.get("https://launchpad.net/testproject/+bug/2", "PRJ") == "OTHER-7"
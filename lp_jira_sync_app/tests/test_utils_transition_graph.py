@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import lp_jira_sync_app.utils.jira_utils as ju
+from lp_jira_sync_app.utils.transition_graph import TransitionGraphCache
+
+WORKFLOW = {
+    "To Do": {"Open": "11"},
+    "Open": {"In Progress": "21", "To Do": "12"},
+    "In Progress": {"Done": "31"},
+}
+
+
+class WorkflowJira:
+    def __init__(self, status):
+        self.status = status
+        self.calls = {"issue": 0, "transitions": 0, "transition_issue": 0}
+
+    def issue(self, key, **kwargs):
+        self.calls["issue"] += 1
+        return make_issue(key, self.status)
+
+    def transitions(self, issue):
+        self.calls["transitions"] += 1
+        return [{"id": i, "to": {"name": name}} for name, i in WORKFLOW[self.status].items()]
+
+    def search_issues(self, jql, maxResults, fields, expand):
+        self.calls["search"] = self.calls.get("search", 0) + 1
+        status = jql.split('status = "')[1].split('"')[0]
+        sample = make_issue("PRJ-99", status)
+        sample.raw = {"transitions": [{"id": i, "to": {"name": n}} for n, i in WORKFLOW.get(status, {}).items()]}
+        return [sample]
+
+    def transition_issue(self, issue, transition):
+        self.calls["transition_issue"] += 1
+        self.status = next(name for name, i in WORKFLOW[self.status].items() if i == transition)
+
+
+def make_issue(key, status):
+    return SimpleNamespace(key=key, fields=SimpleNamespace(
+        status=SimpleNamespace(name=status),
+        project=SimpleNamespace(key="PRJ"),
+        issuetype=SimpleNamespace(name="Bug"),
+    ))
+
+
+def test_route_finds_shortest_path():
+    graph = TransitionGraphCache()
+    for status, edges in WORKFLOW.items():
+        graph.learn(("PRJ", "Bug"), status, [{"id": i, "to": {"name": n}} for n, i in edges.items()])
+
+    assert graph.route(("PRJ", "Bug"), "To Do", "Done") == [("11", "Open"), ("21", "In Progress"), ("31", "Done")]
+    assert graph.route(("PRJ", "Bug"), "Done", "To Do") is None
+    graph.invalidate(("PRJ", "Bug"))
+    assert graph.route(("PRJ", "Bug"), "To Do", "Open") is None
+
+
+def test_transition_to_status_uses_cached_graph_for_multi_hop(monkeypatch):
+    graph = TransitionGraphCache()
+    monkeypatch.setattr(ju, "transition_graph", graph)
+    for status in ("Open", "In Progress"):
+        graph.learn(("PRJ", "Bug"), status,
+                    [{"id": i, "to": {"name": n}} for n, i in WORKFLOW[status].items()])
+
+    jira = WorkflowJira("To Do")
+    assert ju.transition_to_status(jira, make_issue("PRJ-1", "To Do"), "Done", current_status="To Do")
+    assert jira.status == "Done"
+    # Only the unknown "To Do" edges were fetched and the issue was never refreshed
+    assert jira.calls == {"issue": 0, "transitions": 1, "transition_issue": 3}
+
+
+def test_transition_to_status_explores_statuses_it_never_visited(monkeypatch):
+    monkeypatch.setattr(ju, "transition_graph", TransitionGraphCache())
+
+    jira = WorkflowJira("To Do")
+    # "In Progress" is only reachable through "Open", whose edges were never learned
+    assert ju.transition_to_status(jira, make_issue("PRJ-1", "To Do"), "In Progress", current_status="To Do")
+    assert jira.status == "In Progress"
+    assert jira.calls == {"issue": 0, "transitions": 1, "search": 1, "transition_issue": 2}
@@ -0,0 +1,47 @@
+import threading
+
+from lp_jira_sync_app.utils.worker_pool import WebhookWorkerPool
+
+
+def test_worker_pool_processes_events_and_rejects_when_full():
+    started = threading.Event()
+    release = threading.Event()
+    processed = []
+
+    def handler(payload, project_config):
+        started.set()
+        release.wait(5)
+        processed.append(payload["bug"])
+
+    pool = WebhookWorkerPool(handler, worker_count=1, queue_size=1)
+    assert pool.submit({"bug": "/bugs/1"}, {})
+    # Wait until the single worker has picked the first event up
+    assert started.wait(5)
+    assert pool.submit({"bug": "/bugs/2"}, {})
+    assert not pool.submit({"bug": "/bugs/3"}, {})
+
+    release.set()
+    pool.stop()
+    assert processed == ["/bugs/1", "/bugs/2"]
+
+
+def test_events_for_one_bug_stay_ordered_across_lanes():
+    processed = []
+    lock = threading.Lock()
+
+    def handler(payload, project_config):
+        with lock:
+            processed.append((payload["bug"], payload["seq"]))
+
+    pool = WebhookWorkerPool(handler, worker_count=4, queue_size=400)
+    for seq in range(20):
+        for bug in ("/bugs/1", "/bugs/2", "/bugs/3"):
+            assert pool.submit({"bug": bug, "seq": seq}, {})
+    pool.stop()
+
+    for bug in ("/bugs/1", "/bugs/2", "/bugs/3"):
+        assert [seq for b, seq in processed if b == bug] == list(range(20))
+    stats = pool.lane_stats()
+    assert len(stats) == 4
+    assert sum(lane["processed"] for lane in stats) == 60
+    assert all(lane["queued"] == 0 for lane in stats)
@@ -0,0 +1,387 @@
+import asyncio
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from lp_jira_sync_app.utils.config import global_config, logger
+from lp_jira_sync_app.utils.issue_index import get_issue_index
+from lp_jira_sync_app.utils.comment_index import get_comment_index
+from lp_jira_sync_app.utils.metrics import count_jira_request, timed_stage
+from lp_jira_sync_app.utils.circuit_breaker import jira_breaker
+from lp_jira_sync_app.utils.lookup_batcher import AsyncLookupBatcher
+from lp_jira_sync_app.utils.jira_utils import ISSUE_FIELDS, SEARCH_FIELDS, WORKFLOW_FIELDS, COMMENT_FIELD, \
+    COMMENT_URL_PATTERN, \
+    MAX_SEARCH_RESULTS, RESULTS_PER_BUG, LOOKUP_BATCH_WINDOW, LOOKUP_BATCH_SIZE, transition_graph, MISSING_ISSUE_TTL, \
+    MAX_EXPLORE_DEPTH, sample_issue_jql, build_issue_fields, build_issue_edits, build_comment_body, mapped_status, \
+    launchpad_bug_url, bug_search_jql, \
+    match_bug_issues
+from lp_jira_sync_app.utils.jira_clients import DEFAULT_WARM_RETRY_INTERVAL
+
+DEFAULT_POOL_MAXSIZE = 10
+
+lookup_batcher = AsyncLookupBatcher(LOOKUP_BATCH_WINDOW, LOOKUP_BATCH_SIZE)
+
+
+class AsyncJiraError(Exception):
+    """A Jira request answered with an error status; mirrors jira.JIRAError's attributes."""
+
+    def __init__(self, status_code: int, text: str, url: str, response: Optional[httpx.Response] = None):
+        super().__init__(f"HTTP {status_code} {url}: {text}")
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+        self.response = response
+
+
+class AsyncJiraClient:
+    """Minimal asyncio Jira REST client for the operations the bot uses.
+
+    One pooled httpx.AsyncClient is shared by all calls, speaking HTTP/2 when
+    the h2 package is installed. Every method takes an optional per-call
+    timeout in seconds. Requests take a token from the instance's rate
+    limiter without blocking the event loop and report their outcome to the
+    circuit breaker. Issues are returned as the raw JSON dicts of the REST API.
+    """
+
+    def __init__(self, server: str, username: str, token: str, timeout: Optional[float] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, bucket=None, breaker=None, transport=None):
+        self.server = server.rstrip("/")
+        self.bucket = bucket
+        self.breaker = breaker
+        # Jira Cloud replaced POST /search with /search/jql; known once the server info was read
+        self.search_path: Optional[str] = None
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.server}/rest/api/2/",
+            auth=(username, token),
+            headers={"Accept": "application/json"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            http2=transport is None and importlib.util.find_spec("h2") is not None,
+            transport=transport,
+        )
+
+    async def _request(self, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        if self.bucket:
+            wait = self.bucket.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+        request = self._client.build_request(
+            method, path, timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout, **kwargs)
+        count_jira_request(request)
+        started = time.monotonic()
+        try:
+            response = await self._client.send(request)
+        except Exception:
+            if self.breaker:
+                self.breaker.record(False, time.monotonic() - started)
+            raise
+        if self.breaker:
+            self.breaker.record(response.status_code != 429 and response.status_code < 500,
+                                time.monotonic() - started)
+        if response.status_code >= 400:
+            raise AsyncJiraError(response.status_code, response.text, str(request.url), response)
+        return response.json() if response.content else None
+
+    async def search_issues(self, jql: str, fields: str, max_results: int = 50, expand: Optional[str] = None,
+                            timeout: Optional[float] = None) -> List[dict]:
+        if self.search_path is None:
+            await self.server_info(timeout)
+        body = {"jql": jql, "fields": fields.split(","), "maxResults": max_results}
+        if expand:
+            # /search/jql takes a comma separated string, the legacy /search a list
+            body["expand"] = expand if self.search_path == "search/jql" else expand.split(",")
+        return (await self._request("POST", self.search_path, timeout, json=body)).get("issues", [])
+
+    async def issue(self, key: str, fields: Optional[str] = None, expand: Optional[str] = None,
+                    timeout: Optional[float] = None) -> dict:
+        params = {name: value for name, value in (("fields", fields), ("expand", expand)) if value}
+        return await self._request("GET", f"issue/{key}", timeout, params=params)
+
+    async def create_issue(self, fields: Dict[str, Any], timeout: Optional[float] = None) -> dict:
+        return await self._request("POST", "issue", timeout, json={"fields": fields})
+
+    async def edit_issue(self, key: str, fields: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        await self._request("PUT", f"issue/{key}", timeout, json={"fields": fields})
+
+    async def add_comment(self, key: str, body: str, timeout: Optional[float] = None) -> dict:
+        return await self._request("POST", f"issue/{key}/comment", timeout, json={"body": body})
+
+    async def comments(self, key: str, timeout: Optional[float] = None) -> List[dict]:
+        comments = []
+        while True:
+            page = await self._request("GET", f"issue/{key}/comment", timeout,
+                                       params={"startAt": len(comments), "maxResults": 100})
+            comments.extend(page.get("comments", []))
+            if not page.get("comments") or len(comments) >= page.get("total", 0):
+                return comments
+
+    async def transitions(self, key: str, timeout: Optional[float] = None) -> List[dict]:
+        return (await self._request("GET", f"issue/{key}/transitions", timeout)).get("transitions", [])
+
+    async def transition_issue(self, key: str, transition_id: str, timeout: Optional[float] = None) -> None:
+        await self._request("POST", f"issue/{key}/transitions", timeout, json={"transition": {"id": transition_id}})
+
+    async def server_info(self, timeout: Optional[float] = None) -> dict:
+        """Fetch the server info and pick the search endpoint of the deployment type, like JIRA._is_cloud."""
+        info = await self._request("GET", "serverInfo", timeout)
+        self.search_path = "search/jql" if info.get("deploymentType") == "Cloud" else "search"
+        return info
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[AsyncJiraClient] = None
+
+
+def get_async_jira_client() -> AsyncJiraClient:
+    """Return the shared async client for the configured instance, building it if needed."""
+    global _client
+    if _client is None:
+        # Pulls in requests; only needed once a client is actually built
+        from lp_jira_sync_app.utils.rate_limit import get_rate_limiter
+
+        app_config = global_config.get("app") or {}
+        server = app_config.get("jira_instance")
+        username = app_config.get("jira_username")
+        token = app_config.get("jira_token")
+        if not server or not username or not token:
+            raise ValueError("Jira credentials are not configured")
+        bucket = get_rate_limiter(server, float(app_config.get("jira_max_requests_per_second") or 0),
+                                  app_config.get("jira_request_burst"))
+        _client = AsyncJiraClient(server, username, token, timeout=app_config.get("jira_timeout"),
+                                  pool_maxsize=int(app_config.get("jira_pool_maxsize") or DEFAULT_POOL_MAXSIZE),
+                                  bucket=bucket, breaker=jira_breaker)
+        logger.info(f"Built async Jira client for {server} as {username}")
+    return _client
+
+
+async def invalidate_async_jira_client(client: Optional[AsyncJiraClient] = None) -> None:
+    """Close and drop the shared client (only if it is `client`, when given)."""
+    global _client
+    if _client is not None and (client is None or _client is client):
+        closing, _client = _client, None
+        await closing.aclose()
+
+
+class AsyncClientWarmer:
+    """Warms the shared async client on the event loop, retrying until Jira answers.
+
+    The async counterpart of PoolWarmer: the server info request opens the
+    first connection in the httpx pool and tells the client which search
+    endpoint the deployment has; `ready` is set once it answered.
+    """
+
+    def __init__(self, retry_interval: float = DEFAULT_WARM_RETRY_INTERVAL):
+        self.retry_interval = retry_interval
+        self.ready = threading.Event()
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        while True:
+            client = None
+            try:
+                client = get_async_jira_client()
+                await client.server_info()
+            except Exception as e:
+                if client is not None and is_async_client_failure(e):
+                    await invalidate_async_jira_client(client)
+                logger.warning(f"Warming the async Jira client failed, retrying in {self.retry_interval}s: {e}")
+                await asyncio.sleep(self.retry_interval)
+                continue
+            self.seconds = time.perf_counter() - started
+            logger.info(f"Async Jira client warmed in {self.seconds * 1000:.0f} ms")
+            self.ready.set()
+            return
+
+
+def is_async_client_failure(error: Exception) -> bool:
+    """Return True if the error means the async client itself must be rebuilt."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, AsyncJiraError) and error.status_code == 401
+
+
+def _status_name(issue: dict) -> Optional[str]:
+    return ((issue.get("fields") or {}).get("status") or {}).get("name")
+
+
+def _workflow_key(issue: dict) -> tuple:
+    fields = issue.get("fields") or {}
+    project = (fields.get("project") or {}).get("key") or issue["key"].split("-")[0]
+    return project, (fields.get("issuetype") or {}).get("name") or ""
+
+
+@timed_stage("find_jira_issue")
+async def find_jira_issue(client: AsyncJiraClient, project_key: str, bug_url: str,
+                          with_comments: bool = False) -> Optional[dict]:
+    """Async counterpart of jira_utils.find_jira_issue."""
+    extra_fields = "," + COMMENT_FIELD if with_comments and not get_comment_index() else ""
+    index = get_issue_index()
+    if index:
+        jira_key = index.get(bug_url, project_key)
+        if jira_key:
+            try:
+                return await client.issue(jira_key, fields=ISSUE_FIELDS + extra_fields)
+            except AsyncJiraError as e:
+                if e.status_code != 404:
+                    raise
+                index.remove(bug_url, project_key)
+        elif MISSING_ISSUE_TTL and index.is_missing(bug_url, project_key):
+            return None
+
+    if LOOKUP_BATCH_WINDOW:
+        issue = await lookup_batcher.lookup(
+            (id(client), project_key, extra_fields), bug_url,
+            lambda bug_urls: search_jira_issues(client, project_key, bug_urls, SEARCH_FIELDS + extra_fields))
+    else:
+        issue = (await search_jira_issues(client, project_key, [bug_url], SEARCH_FIELDS + extra_fields))[bug_url]
+    if issue is not None:
+        if index:
+            index.put(bug_url, project_key, issue["key"])
+        return issue
+    if index and MISSING_ISSUE_TTL:
+        index.mark_missing(bug_url, project_key, MISSING_ISSUE_TTL)
+    return None
+
+
+async def search_jira_issues(client: AsyncJiraClient, project_key: str, bug_urls: List[str],
+                             fields: str = SEARCH_FIELDS) -> Dict[str, Any]:
+    """Async counterpart of jira_utils.search_jira_issues."""
+    max_results = min(RESULTS_PER_BUG * len(bug_urls), MAX_SEARCH_RESULTS)
+    issues = await client.search_issues(bug_search_jql(project_key, bug_urls), fields, max_results=max_results)
+    found = match_bug_issues(issues, bug_urls, lambda issue: (issue.get("fields") or {}).get("description"))
+    if len(bug_urls) > 1 and len(issues) >= max_results:
+        for bug_url in [bug_url for bug_url, issue in found.items() if issue is None]:
+            found.update(await search_jira_issues(client, project_key, [bug_url], fields))
+    return found
+
+
+async def find_jira_comment(client: AsyncJiraClient, issue: dict, comment_path: str) -> bool:
+    """Async counterpart of jira_utils.find_jira_comment."""
+    index = get_comment_index()
+    if not index:
+        comments = ((issue.get("fields") or {}).get(COMMENT_FIELD) or {}).get("comments")
+        if comments is None:
+            comments = await client.comments(issue["key"])
+        return any(comment_path in (comment.get("body") or "") for comment in comments)
+
+    if not index.is_indexed(issue["key"]):
+        comment_urls = []
+        for comment in await client.comments(issue["key"]):
+            match = COMMENT_URL_PATTERN.search(comment.get("body") or "")
+            if match:
+                comment_urls.append(match.group(1))
+        index.mark_indexed(issue["key"], comment_urls)
+    return index.contains(issue["key"], f"{global_config.get('app').get('launchpad_url')}{comment_path}")
+
+
+@timed_stage("create_jira_issue")
+async def create_jira_issue(client: AsyncJiraClient, bug_object: dict, project_config) -> dict:
+    """Async counterpart of jira_utils.create_jira_issue."""
+    fields = build_issue_fields(bug_object, project_config)
+    issue = await client.create_issue(fields)
+    index = get_issue_index()
+    if index:
+        index.put(launchpad_bug_url(bug_object), fields["project"]["key"], issue["key"])
+    comment_index = get_comment_index()
+    if comment_index:
+        comment_index.mark_indexed(issue["key"], [])
+    status = mapped_status(bug_object, project_config)
+    if status:
+        await transition_to_status(client, issue, status)
+    return issue
+
+
+async def explore_route(client: AsyncJiraClient, workflow: tuple, from_status: str,
+                        to_status: str) -> Optional[List[tuple]]:
+    """Async counterpart of jira_utils.explore_route."""
+    tried = set()
+    for _ in range(MAX_EXPLORE_DEPTH):
+        statuses = [status for status in transition_graph.unexplored(workflow, from_status) if status not in tried]
+        if not statuses:
+            return None
+        for status in statuses:
+            tried.add(status)
+            sample = await client.search_issues(sample_issue_jql(workflow, status), "status", max_results=1,
+                                                expand="transitions")
+            if sample and sample[0].get("transitions") is not None:
+                transition_graph.learn(workflow, status, sample[0]["transitions"])
+        path = transition_graph.route(workflow, from_status, to_status)
+        if path is not None:
+            return path
+    return None
+
+
+@timed_stage("transition_to_status")
+async def transition_to_status(client: AsyncJiraClient, issue: dict, desired_status: str,
+                               current_status: Optional[str] = None) -> bool:
+    """Async counterpart of jira_utils.transition_to_status, sharing its workflow graph cache."""
+    workflow = None
+    if current_status is None:
+        issue = await client.issue(issue["key"], fields=WORKFLOW_FIELDS, expand="transitions")
+        current_status = _status_name(issue)
+        workflow = _workflow_key(issue)
+        if current_status != desired_status and issue.get("transitions") is not None:
+            transition_graph.learn(workflow, current_status, issue["transitions"])
+    if current_status == desired_status:
+        return True
+
+    workflow = workflow or _workflow_key(issue)
+    for attempt in range(2):
+        if transition_graph.edges(workflow, current_status) is None:
+            transition_graph.learn(workflow, current_status, await client.transitions(issue["key"]))
+        path = transition_graph.route(workflow, current_status, desired_status) or \
+            await explore_route(client, workflow, current_status, desired_status)
+        if path is None:
+            return False
+
+        try:
+            for transition_id, status in path:
+                await client.transition_issue(issue["key"], transition_id)
+                current_status = status
+            return True
+        except AsyncJiraError as e:
+            logger.warning(f"Transition of {issue['key']} to {desired_status} failed: {e}")
+            transition_graph.invalidate(workflow)
+            if attempt:
+                raise
+            current_status = _status_name(await client.issue(issue["key"], fields="status"))
+            if current_status == desired_status:
+                return True
+    return False
+
+
+@timed_stage("create_jira_comment")
+async def create_jira_comment(client: AsyncJiraClient, issue: dict, bug_object: dict) -> None:
+    """Async counterpart of jira_utils.create_jira_comment."""
+    comment_url, body = build_comment_body(bug_object)
+    await client.add_comment(issue["key"], body)
+    index = get_comment_index()
+    if index:
+        index.add(issue["key"], comment_url)
+
+
+@timed_stage("update_jira_issue")
+async def update_jira_issue(client: AsyncJiraClient, issue: dict, bug_object: dict, project_config,
+                            changed_fields=None) -> dict:
+    """Async counterpart of jira_utils.update_jira_issue: one edit and at most one transition."""
+    edits, desired_status = build_issue_edits(bug_object, project_config, changed_fields)
+    if edits:
+        await client.edit_issue(issue["key"], edits)
+    if desired_status:
+        await transition_to_status(client, issue, desired_status, current_status=_status_name(issue))
+    return issue
@@ -0,0 +1,133 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Set, Tuple
+
+
+from lp_jira_sync_app.utils.config import logger
+from lp_jira_sync_app.utils.comment_index import CommentIndex
+from lp_jira_sync_app.utils.issue_index import IssueIndex
+from lp_jira_sync_app.utils.jira_utils import build_issue_fields, mapped_status, launchpad_bug_url, \
+    transition_to_status, search_jira_issues
+from lp_jira_sync_app.utils.state_db import StateDB
+
+if TYPE_CHECKING:
+    from jira import JIRA
+
+DEFAULT_CHUNK_SIZE = 50  # Jira accepts at most 50 issues per bulk create
+DEFAULT_TRANSITION_WORKERS = 4
+
+
+def read_bug_export(path: str, start_line: int = 0, retry_lines: Set[int] = frozenset()) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, payload) for bug creation payloads after start_line or in retry_lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if (number <= start_line and number not in retry_lines) or not line.strip():
+                continue
+            payload = json.loads(line)
+            if payload.get("action", "created") == "created" and "bug_comment" not in payload:
+                yield number, payload
+
+
+def _chunks(rows: Iterator[Tuple[int, dict]], size: int) -> Iterator[List[Tuple[int, dict]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkImporter:
+    """Creates Jira issues for an export of existing Launchpad bugs.
+
+    Bugs already in the issue index are skipped. Bugs missing from it are
+    looked up with one search per chunk, so issues that were never indexed
+    (or created by a run that crashed before indexing them) are not created
+    twice. The rest are created with the bulk create endpoint a chunk at a
+    time, and status transitions run on a bounded thread pool. The last line
+    of every finished chunk is checkpointed, so an interrupted import
+    resumes after it. Lines whose issue could not be created are recorded
+    and retried by the next run.
+    """
+
+    def __init__(self, jira_client: "JIRA", db: StateDB, project_config, checkpoint_name: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, transition_workers: int = DEFAULT_TRANSITION_WORKERS):
+        self.jira_client = jira_client
+        self.db = db
+        self.index = IssueIndex(db)
+        self.comment_index = CommentIndex(db)
+        self.project_config = project_config
+        self.project_key = project_config.get("jira_project_key")
+        self.checkpoint = f"bulk-import:{checkpoint_name}"
+        self.failed_lines = f"bulk-import:{checkpoint_name}:failed"
+        self.chunk_size = min(chunk_size, DEFAULT_CHUNK_SIZE)
+        self.transition_workers = transition_workers
+        self.stats = {"created": 0, "skipped": 0, "failed": 0, "not_transitioned": 0}
+
+    def run(self, path: str) -> dict:
+        start_line = int(self.db.get_value(self.checkpoint) or 0)
+        failed = set(json.loads(self.db.get_value(self.failed_lines) or "[]"))
+        if start_line:
+            logger.info(f"Resuming import of {path} after line {start_line}, retrying {len(failed)} failed lines")
+        with ThreadPoolExecutor(max_workers=self.transition_workers) as pool:
+            for chunk in _chunks(read_bug_export(path, start_line, failed), self.chunk_size):
+                failed_now = self._import_chunk(chunk, pool)
+                failed = (failed - {number for number, _ in chunk}) | failed_now
+                self.db.set_value(self.failed_lines, json.dumps(sorted(failed)))
+                start_line = max(start_line, chunk[-1][0])
+                self.db.set_value(self.checkpoint, str(start_line))
+                logger.info(f"Imported up to line {start_line}: {self.stats}")
+        return self.stats
+
+    def _import_chunk(self, chunk: List[Tuple[int, dict]], pool: ThreadPoolExecutor) -> Set[int]:
+        """Import one chunk and return the line numbers whose issue could not be created."""
+        unindexed = []
+        for number, payload in chunk:
+            bug_url = launchpad_bug_url(payload)
+            if self.index.get(bug_url, self.project_key):
+                self.stats["skipped"] += 1
+                continue
+            unindexed.append((number, bug_url, payload))
+        if not unindexed:
+            return set()
+
+        existing = search_jira_issues(self.jira_client, self.project_key, [bug_url for _, bug_url, _ in unindexed])
+        found = [(bug_url, self.project_key, issue.key) for bug_url, issue in existing.items() if issue is not None]
+        self.index.put_many(found)
+        self.stats["skipped"] += len(found)
+        pending = [row for row in unindexed if existing[row[1]] is None]
+        if not pending:
+            return set()
+
+        results = self.jira_client.create_issues(
+            [build_issue_fields(payload, self.project_config) for _, _, payload in pending], prefetch=False)
+        created, transitions, failed = [], [], set()
+        for (number, bug_url, payload), result in zip(pending, results):
+            if result.get("status") != "Success":
+                self.stats["failed"] += 1
+                failed.add(number)
+                logger.error(f"Failed to create Jira issue for Launchpad Bug {bug_url} (line {number}): "
+                             f"{result.get('error')}")
+                continue
+            issue = result["issue"]
+            created.append((bug_url, self.project_key, issue.key))
+            status = mapped_status(payload, self.project_config)
+            if status:
+                transitions.append(pool.submit(transition_to_status, self.jira_client, issue, status))
+        self.index.put_many(created)
+        for _, _, issue_key in created:
+            # New issues have no comments to scan before the first comment is synced
+            self.comment_index.mark_indexed(issue_key, [])
+        self.stats["created"] += len(created)
+
+        # The chunk only counts as done (and is checkpointed) once its transitions finished
+        for future in transitions:
+            try:
+                if not future.result():
+                    self.stats["not_transitioned"] += 1
+            except Exception as e:
+                self.stats["not_transitioned"] += 1
+                logger.error(f"Failed to transition imported issue: {e}")
+        return failed
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from lp_jira_sync_app.utils.config import global_config, logger
+from lp_jira_sync_app.utils.metrics import registry, Counter, Gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_SLOW_CALL_SECONDS = 10.0
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 10
+DEFAULT_OPEN_SECONDS = 30.0
+DEFAULT_HALF_OPEN_PROBES = 1
+
+CIRCUIT_TRIPS = registry.register(Counter(
+    "lp_jira_sync_circuit_breaker_trips_total", "Times the Jira circuit breaker opened"))
+
+
+class CircuitBreaker:
+    """Stops sending events to Jira while it is failing or too slow.
+
+    Every Jira request is recorded. A request counts as failed on a network
+    error, a 429 or 5xx answer, or when it takes longer than
+    slow_call_seconds. When the failed share of the last window_size
+    requests reaches failure_rate, the breaker opens. No events are
+    attempted for open_seconds. After that it is half-open, and up to
+    half_open_probes events go through: one good request closes the breaker
+    again and one failure reopens it.
+    """
+
+    def __init__(self, failure_rate: float = DEFAULT_FAILURE_RATE,
+                 slow_call_seconds: Optional[float] = DEFAULT_SLOW_CALL_SECONDS,
+                 window_size: int = DEFAULT_WINDOW_SIZE, min_calls: int = DEFAULT_MIN_CALLS,
+                 open_seconds: float = DEFAULT_OPEN_SECONDS, half_open_probes: int = DEFAULT_HALF_OPEN_PROBES):
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.trips = 0
+        self._results = deque(maxlen=window_size)
+        self._changed_at = time.monotonic()
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if an event may be sent to Jira now; takes a probe slot when half-open."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._changed_at < self.open_seconds:
+                    return False
+                self._set_state(HALF_OPEN, now)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    # Probes that never reported back (e.g. no request was needed) expire
+                    if now - self._changed_at < self.open_seconds:
+                        return False
+                    self._changed_at = now
+                    self._probes = 0
+                self._probes += 1
+            return True
+
+    def is_open(self) -> bool:
+        """True while events must not be attempted; does not take a probe slot."""
+        return self.open_delay() is not None
+
+    def open_delay(self) -> Optional[float]:
+        """Seconds left before a probe may go through, or None when events may be attempted.
+
+        Checking the state and reading the delay under one lock keeps the
+        breaker from closing in between, so an open breaker never reports 0.
+        """
+        with self._lock:
+            remaining = self.open_seconds - (time.monotonic() - self._changed_at)
+            if self.state != OPEN or remaining <= 0:
+                return None
+            return remaining
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through (0 when it is not open)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._changed_at))
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """Record the outcome of one Jira request."""
+        failed = not ok or (self.slow_call_seconds is not None and seconds >= self.slow_call_seconds)
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._trip()
+                else:
+                    self._set_state(CLOSED, time.monotonic())
+                    logger.info("Jira circuit breaker closed")
+                return
+            if self.state == OPEN:
+                return  # late answers to requests sent before the breaker opened
+            self._results.append(failed)
+            if len(self._results) >= self.min_calls and sum(self._results) / len(self._results) >= self.failure_rate:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._set_state(OPEN, time.monotonic())
+        self.trips += 1
+        CIRCUIT_TRIPS.inc()
+        logger.warning(f"Jira circuit breaker opened for {self.open_seconds:.0f}s")
+
+    def _set_state(self, state: str, now: float) -> None:
+        self.state = state
+        self._changed_at = now
+        self._probes = 0
+        self._results.clear()
+
+
+def build_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Return a breaker built from app config, or None unless app.circuit_breaker_enabled is set."""
+    app_config = global_config.get("app") or {}
+    if not app_config.get("circuit_breaker_enabled"):
+        return None
+    slow_call_seconds = app_config.get("circuit_breaker_slow_call_seconds", DEFAULT_SLOW_CALL_SECONDS)
+    return CircuitBreaker(
+        failure_rate=float(app_config.get("circuit_breaker_failure_rate") or DEFAULT_FAILURE_RATE),
+        slow_call_seconds=float(slow_call_seconds) if slow_call_seconds else None,
+        window_size=int(app_config.get("circuit_breaker_window_size") or DEFAULT_WINDOW_SIZE),
+        min_calls=int(app_config.get("circuit_breaker_min_calls") or DEFAULT_MIN_CALLS),
+        open_seconds=float(app_config.get("circuit_breaker_open_seconds") or DEFAULT_OPEN_SECONDS),
+        half_open_probes=int(app_config.get("circuit_breaker_half_open_probes") or DEFAULT_HALF_OPEN_PROBES),
+    )
+
+
+jira_breaker = build_circuit_breaker()
+registry.register(Gauge("lp_jira_sync_circuit_breaker_state", "Jira circuit breaker state (1 = current)", ["state"],
+                        callback=lambda: [((state,), float(jira_breaker is not None and jira_breaker.state == state))
+                                          for state in (CLOSED, OPEN, HALF_OPEN)]))
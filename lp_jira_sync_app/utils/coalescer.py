@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Set
+
+from lp_jira_sync_app.utils.config import logger
+
+FlushCallback = Callable[[dict, Set[str], Mapping, List[int]], None]
+
+
+class _PendingChanges:
+    __slots__ = ("payload", "fields", "project_config", "due", "deadline", "outbox_ids")
+
+    def __init__(self, payload: dict, project_config: Mapping, now: float, max_delay: float):
+        self.payload = payload
+        self.fields: Set[str] = set()
+        self.project_config = project_config
+        self.due = now
+        self.deadline = now + max_delay
+        self.outbox_ids: List[int] = []
+
+
+class ChangeCoalescer:
+    """Debounces *-changed events per bug and flushes them as one update.
+
+    Each event pushes the flush back by `window` seconds, but never past
+    `max_delay` seconds after the first pending event. Newer `new` values
+    override older ones field by field. The outbox ids of the merged events
+    are passed to the flush callback, which settles them.
+    """
+
+    def __init__(self, flush: FlushCallback):
+        self._flush = flush
+        self._pending: Dict[Hashable, _PendingChanges] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, key: Hashable, payload: dict, project_config: Mapping, window: float, max_delay: float,
+            outbox_id: Optional[int] = None) -> None:
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _PendingChanges(dict(payload), project_config, now, max_delay)
+                pending.payload["new"] = {}
+            pending.payload["new"].update(payload.get("new") or {})
+            pending.fields.add(payload.get("action").split("-")[0])
+            pending.project_config = project_config
+            if outbox_id is not None:
+                pending.outbox_ids.append(outbox_id)
+            pending.due = min(now + window, pending.deadline)
+            self._wake()
+
+    def requeue(self, key: Hashable, payload: dict, fields: Set[str], project_config: Mapping, delay: float,
+                outbox_ids: Iterable[int] = ()) -> None:
+        """Put merged changes that could not be applied back, to be flushed again after delay seconds.
+
+        Changes that arrived for the bug in the meantime override them.
+        """
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _PendingChanges(dict(payload), project_config, now, delay)
+                pending.payload["new"] = {}
+            pending.payload["new"] = {**(payload.get("new") or {}), **pending.payload["new"]}
+            pending.fields |= fields
+            pending.outbox_ids[:0] = outbox_ids
+            pending.due = pending.deadline = max(pending.due, now + delay)
+            self._wake()
+
+    def _wake(self) -> None:
+        # Called with self._cond held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="change-coalescer", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def holds(self, outbox_ids: Iterable[int]) -> bool:
+        """True if every given outbox event is waiting here to be merged."""
+        with self._cond:
+            held = {entry_id for pending in self._pending.values() for entry_id in pending.outbox_ids}
+        return held.issuperset(outbox_ids)
+
+    def flush_all(self) -> None:
+        """Flush every pending bug now, e.g. on shutdown."""
+        with self._cond:
+            batches, self._pending = list(self._pending.values()), {}
+        for pending in batches:
+            self._apply(pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = [key for key, pending in self._pending.items() if pending.due <= now]
+                if not due:
+                    self._cond.wait(min(p.due for p in self._pending.values()) - now)
+                    continue
+                batches = [self._pending.pop(key) for key in due]
+            for pending in batches:
+                self._apply(pending)
+
+    def _apply(self, pending: _PendingChanges) -> None:
+        try:
+            self._flush(pending.payload, pending.fields, pending.project_config, pending.outbox_ids)
+        except Exception as e:
+            logger.error(f"Failed to flush changes for Launchpad Bug {pending.payload.get('bug')}: {e}")
@@ -0,0 +1,59 @@
+from typing import Iterable, Optional
+
+from lp_jira_sync_app.utils.state_db import StateDB, get_state_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced_comments (
+    issue_key TEXT NOT NULL,
+    comment_url TEXT NOT NULL,
+    PRIMARY KEY (issue_key, comment_url)
+);
+CREATE TABLE IF NOT EXISTS comment_indexed_issues (
+    issue_key TEXT PRIMARY KEY
+);
+"""
+
+
+class CommentIndex:
+    """Set of Launchpad comment URLs already copied to each Jira issue.
+
+    An issue is "indexed" once its existing Jira comments have been scanned;
+    from then on duplicate checks never need the comment list.
+    """
+
+    def __init__(self, db: StateDB):
+        self._db = db
+        db.ensure_schema(SCHEMA)
+
+    def contains(self, issue_key: str, comment_url: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM synced_comments WHERE issue_key = ? AND comment_url = ?",
+            (issue_key, comment_url),
+        ).fetchone()
+        return row is not None
+
+    def add(self, issue_key: str, comment_url: str) -> None:
+        self._db.execute(
+            "INSERT OR IGNORE INTO synced_comments (issue_key, comment_url) VALUES (?, ?)",
+            (issue_key, comment_url),
+        )
+
+    def is_indexed(self, issue_key: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM comment_indexed_issues WHERE issue_key = ?", (issue_key,)
+        ).fetchone()
+        return row is not None
+
+    def mark_indexed(self, issue_key: str, comment_urls: Iterable[str]) -> None:
+        """Store the comment URLs found on an issue and flag it as indexed."""
+        rows = [(issue_key, url) for url in comment_urls]
+        self._db.executemany(
+            "INSERT OR IGNORE INTO synced_comments (issue_key, comment_url) VALUES (?, ?)", rows)
+        self._db.execute(
+            "INSERT OR IGNORE INTO comment_indexed_issues (issue_key) VALUES (?)", (issue_key,))
+
+
+def get_comment_index() -> Optional[CommentIndex]:
+    """Return the comment index, or None when no state database is configured."""
+    db = get_state_db()
+    return CommentIndex(db) if db else None
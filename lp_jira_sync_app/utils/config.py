@@ -2,22 +2,41 @@ import logging
 import os
 import yaml
 import base64
-import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any, Optional
 
+from lp_jira_sync_app.utils.log import JsonFormatter, configure_queue_logging, DEFAULT_MAX_FIELD_CHARS, \
+    DEFAULT_REPEAT_INTERVAL
+
 # Allow overriding the config path via environment in docker-compose file
 CONFIG_PATH = os.getenv("CONFIG_PATH", "config.yaml")
 
-def define_logger():
-    """Define logger to output to the file and to STDOUT."""
+def define_logger(app_config: Optional[Mapping] = None):
+    """Define logger to output to STDOUT through a background thread.
+
+    app.log_format selects JSON lines ("json", the default) or the plain text
+    format; app.log_level, app.log_max_field_chars and app.log_repeat_interval
+    tune the level, the truncation of long values and how often an identical
+    error is repeated.
+    """
+    app_config = app_config or {}
     log = logging.getLogger("lp-jira-sync-bot")
-    log.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        fmt="%(asctime)s (%(levelname)s) %(message)s", datefmt="%d.%m.%Y %H:%M:%S"
-    )
+    log.setLevel(str(app_config.get("log_level") or "INFO").upper())
+    if (app_config.get("log_format") or "json") == "json":
+        formatter = JsonFormatter(int(app_config.get("log_max_field_chars") or DEFAULT_MAX_FIELD_CHARS))
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s (%(levelname)s) %(message)s", datefmt="%d.%m.%Y %H:%M:%S"
+        )
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(formatter)
-    log.addHandler(stream_handler)
+    repeat_interval = app_config.get("log_repeat_interval")
+    configure_queue_logging(log, stream_handler,
+                            DEFAULT_REPEAT_INTERVAL if repeat_interval is None else float(repeat_interval))
     return log
 
 
@@ -51,8 +70,25 @@ def decode_base64_yaml(value: Optional[str]) -> Any:
     except Exception as e:
         raise ValueError(f"Invalid YAML content: {e}")
 
-def merge_project_config(yaml_param: Optional[str]) -> Optional[dict]:
-    base = copy.deepcopy(global_config.get("project") or {})
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of nested dicts and lists."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def validate_project_config(project_config: dict) -> None:
+    for key in ("status_mapping", "severity_mapping"):
+        value = project_config.get(key)
+        if value is not None and not isinstance(value, Mapping):
+            raise ValueError(f"\"{key}\" must be a mapping")
+    components = project_config.get("components")
+    if components is not None and not isinstance(components, (list, tuple)):
+        raise ValueError("\"components\" must be a list")
+
+def build_project_config(yaml_param: Optional[str]) -> Mapping:
+    base = dict(global_config.get("project") or {})
     if yaml_param:
         try:
             yaml_data = decode_base64_yaml(yaml_param)
@@ -61,8 +97,74 @@ def merge_project_config(yaml_param: Optional[str]) -> Optional[dict]:
         except Exception as e:
                 raise ValueError(f"Invalid base64 YAML in \"yaml\" query parameter: {e}")
 
-    return base
+    validate_project_config(base)
+    if float(base.get("coalesce_window_seconds") or 0) > 0 and not has_durable_outbox():
+        # Coalesced changes are acknowledged before they are applied; only the outbox can retry them
+        logger.warning("coalesce_window_seconds needs app.outbox_enabled (with async_processing and a "
+                       "state database), applying changes immediately")
+        base["coalesce_window_seconds"] = 0
+    return freeze(base)
+
+def has_durable_outbox() -> bool:
+    """True when accepted events are stored in the outbox until they are synced."""
+    app_config = global_config.get("app") or {}
+    return bool(app_config.get("outbox_enabled") and app_config.get("async_processing")
+                and app_config.get("state_db_path"))
+
+class ProjectConfigCache:
+    """Bounded LRU of parsed project configs keyed by a hash of the raw "yaml" parameter.
+
+    Launchpad sends the same parameter on every delivery of a hook, so it is
+    decoded and validated once. Invalid parameters are cached too and keep
+    raising the same ValueError without being parsed again.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, yaml_param: Optional[str]) -> Mapping:
+        key = hashlib.sha256((yaml_param or "").encode("utf-8")).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            try:
+                entry = build_project_config(yaml_param)
+            except ValueError as e:
+                entry = e
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        if isinstance(entry, ValueError):
+            raise ValueError(str(entry))
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+def merge_project_config(yaml_param: Optional[str]) -> Mapping:
+    """Return the read-only project config for a webhook's "yaml" query parameter."""
+    return project_config_cache.get(yaml_param)
 
 # Load configuration
 global_config = load_config(CONFIG_PATH)
-logger = define_logger()
\ No newline at end of file
+logger = define_logger(global_config.get("app"))
+project_config_cache = ProjectConfigCache(
+    maxsize=int((global_config.get("app") or {}).get("project_config_cache_size") or 128))
\ No newline at end of file
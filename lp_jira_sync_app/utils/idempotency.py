@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from lp_jira_sync_app.utils.config import global_config
+from lp_jira_sync_app.utils.state_db import StateDB, get_state_db
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 10000
+DELIVERY_HEADER = "X-Launchpad-Delivery"
+# Expired rows are purged from the database every this many stores
+PURGE_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    delivery TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+def delivery_key(request, body_digest: bool = False) -> Optional[str]:
+    """Launchpad's delivery id, or None when the request has none.
+
+    With body_digest, requests without a delivery id are keyed on the digest
+    computed while verifying the signature. Launchpad can send the same body
+    twice for two genuine changes, so this is off unless configured.
+    """
+    delivery = request.headers.get(DELIVERY_HEADER)
+    if delivery:
+        return f"id:{delivery}"
+    digest = getattr(request.state, "body_digest", None) if body_digest else None
+    return f"sha1:{digest}" if digest else None
+
+
+class DeliveryCache:
+    """Bounded, TTL-evicting store of webhook responses keyed by delivery.
+
+    Launchpad redelivers a webhook when it times out waiting for us. A repeat
+    gets the stored response back without another Jira round trip. With a
+    state database the responses are also written to SQLite, so they survive
+    a restart.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, maxsize: int = DEFAULT_MAX_ENTRIES,
+                 db: Optional[StateDB] = None, body_digest: bool = False):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.db = db
+        # Also key deliveries without an id on their body digest
+        self.body_digest = body_digest
+        self.hits = 0
+        self.misses = 0
+        self._stores = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if db:
+            db.ensure_schema(SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[int, dict]]:
+        """Return the (status code, content) stored for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is None and self.db:
+            row = self.db.execute("SELECT status, content, expires FROM webhook_deliveries "
+                                  "WHERE delivery = ? AND expires > ?", (key, now)).fetchone()
+            if row:
+                entry = (row[2], row[0], json.loads(row[1]))
+                self._remember(key, entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key: str, status_code: int, content: dict) -> None:
+        entry = (time.time() + self.ttl, status_code, content)
+        self._remember(key, entry)
+        if self.db:
+            self.db.execute("INSERT OR REPLACE INTO webhook_deliveries (delivery, status, content, expires) "
+                            "VALUES (?, ?, ?, ?)", (key, status_code, json.dumps(content), entry[0]))
+            self._stores += 1
+            if self._stores % PURGE_EVERY == 0:
+                self.db.execute("DELETE FROM webhook_deliveries WHERE expires <= ?", (time.time(),))
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.db:
+            self.db.execute("DELETE FROM webhook_deliveries")
+
+
+def get_delivery_cache() -> Optional[DeliveryCache]:
+    """Return a delivery cache built from app config, or None when app.delivery_cache_ttl is 0."""
+    app_config = global_config.get("app") or {}
+    ttl = app_config.get("delivery_cache_ttl", DEFAULT_TTL_SECONDS)
+    if not ttl:
+        return None
+    db = get_state_db() if app_config.get("delivery_cache_persist") else None
+    return DeliveryCache(float(ttl), int(app_config.get("delivery_cache_size") or DEFAULT_MAX_ENTRIES), db,
+                         bool(app_config.get("delivery_cache_body_digest")))
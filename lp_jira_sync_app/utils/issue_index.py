@@ -0,0 +1,99 @@
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from lp_jira_sync_app.utils.state_db import StateDB, get_state_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jira_issues (
+    bug_url TEXT NOT NULL,
+    project_key TEXT NOT NULL,
+    issue_key TEXT NOT NULL,
+    PRIMARY KEY (bug_url, project_key)
+);
+CREATE TABLE IF NOT EXISTS missing_jira_issues (
+    bug_url TEXT NOT NULL,
+    project_key TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (bug_url, project_key)
+);
+"""
+
+
+class IssueIndex:
+    """Maps a Launchpad bug URL to the key of the Jira issue created for it.
+
+    It also remembers, for a limited time, bugs a search found no issue for,
+    so events of bugs that were never synced don't search Jira every time.
+    Storing an issue for a bug clears that entry.
+    """
+
+    def __init__(self, db: StateDB):
+        self._db = db
+        db.ensure_schema(SCHEMA)
+
+    def get(self, bug_url: str, project_key: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT issue_key FROM jira_issues WHERE bug_url = ? AND project_key = ?",
+            (bug_url, project_key),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, bug_url: str, project_key: str, issue_key: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO jira_issues (bug_url, project_key, issue_key) VALUES (?, ?, ?)",
+            (bug_url, project_key, issue_key),
+        )
+        self._db.execute(
+            "DELETE FROM missing_jira_issues WHERE bug_url = ? AND project_key = ?", (bug_url, project_key))
+
+    def put_many(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Store (bug_url, project_key, issue_key) rows in one transaction."""
+        rows = list(rows)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO jira_issues (bug_url, project_key, issue_key) VALUES (?, ?, ?)",
+            rows,
+        )
+        self._db.executemany(
+            "DELETE FROM missing_jira_issues WHERE bug_url = ? AND project_key = ?",
+            [(bug_url, project_key) for bug_url, project_key, _ in rows],
+        )
+
+    def is_missing(self, bug_url: str, project_key: str) -> bool:
+        """True if a recent search found no Jira issue for the bug."""
+        row = self._db.execute(
+            "SELECT 1 FROM missing_jira_issues WHERE bug_url = ? AND project_key = ? AND expires > ?",
+            (bug_url, project_key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def mark_missing(self, bug_url: str, project_key: str, ttl: float) -> None:
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO missing_jira_issues (bug_url, project_key, expires) VALUES (?, ?, ?)",
+            (bug_url, project_key, now + ttl),
+        )
+        # Keeps the table bounded by the bugs seen within one TTL
+        self._db.execute("DELETE FROM missing_jira_issues WHERE expires <= ?", (now,))
+
+    def issue_keys(self, project_key: str) -> List[str]:
+        rows = self._db.execute(
+            "SELECT issue_key FROM jira_issues WHERE project_key = ? ORDER BY issue_key", (project_key,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, bug_url: str, project_key: str) -> None:
+        self._db.execute(
+            "DELETE FROM jira_issues WHERE bug_url = ? AND project_key = ?",
+            (bug_url, project_key),
+        )
+
+    def clear(self) -> None:
+        """Forget every indexed issue and every bug known to have none."""
+        self._db.execute("DELETE FROM jira_issues")
+        self._db.execute("DELETE FROM missing_jira_issues")
+
+
+def get_issue_index() -> Optional[IssueIndex]:
+    """Return the issue index, or None when no state database is configured."""
+    db = get_state_db()
+    return IssueIndex(db) if db else None
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from lp_jira_sync_app.utils.config import global_config, logger
+from lp_jira_sync_app.utils.jira_utils import build_jira_client
+from lp_jira_sync_app.utils.metrics import count_jira_request, timed_stage
+from lp_jira_sync_app.utils.circuit_breaker import jira_breaker
+
+if TYPE_CHECKING:
+    from jira import JIRA
+
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_WARM_RETRY_INTERVAL = 5.0
+
+
+class JiraClientPool:
+    """Registry of long-lived JIRA clients keyed by (instance, username).
+
+    Clients are built lazily on first use and then shared by every webhook, so
+    the HTTP session, its keep-alive connections and the server-info handshake
+    done at construction are paid once per process instead of once per event.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], "JIRA"] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key() -> Tuple[str, str]:
+        app_config = global_config.get("app") or {}
+        return app_config.get("jira_instance") or "", app_config.get("jira_username") or ""
+
+    @staticmethod
+    def _build() -> "JIRA":
+        # Pulls in requests; only needed once a client is actually built
+        from lp_jira_sync_app.utils.rate_limit import RateLimitedAdapter, get_rate_limiter
+
+        app_config = global_config.get("app") or {}
+        pool_maxsize = int(app_config.get("jira_pool_maxsize") or DEFAULT_POOL_MAXSIZE)
+        bucket = get_rate_limiter(app_config.get("jira_instance") or "",
+                                  float(app_config.get("jira_max_requests_per_second") or 0),
+                                  app_config.get("jira_request_burst"))
+        client = build_jira_client()
+        # Bound the number of keep-alive connections per host and make extra
+        # threads wait for a free connection instead of opening throwaway ones.
+        # Every request also takes a token from the instance's rate limiter.
+        # The circuit breaker sees the outcome of every request.
+        adapter = RateLimitedAdapter(bucket, on_send=count_jira_request,
+                                     on_result=jira_breaker.record if jira_breaker else None,
+                                     pool_connections=1, pool_maxsize=pool_maxsize, pool_block=True)
+        client._session.mount("https://", adapter)
+        client._session.mount("http://", adapter)
+        return client
+
+    def get(self) -> "JIRA":
+        """Return the shared client for the configured instance, building it if needed."""
+        key = self._key()
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build()
+                self._clients[key] = client
+                logger.info(f"Built Jira client for {key[0]} as {key[1]}")
+            return client
+
+    def invalidate(self, client: Optional["JIRA"] = None) -> None:
+        """Drop a client so the next get() rebuilds it.
+
+        When a client is given only that exact instance is dropped, so a client
+        rebuilt concurrently by another thread is left alone.
+        """
+        with self._lock:
+            if client is None:
+                self._clients.clear()
+                return
+            for key, cached in list(self._clients.items()):
+                if cached is client:
+                    del self._clients[key]
+                    logger.info(f"Dropped Jira client for {key[0]} as {key[1]}")
+
+    def warm(self) -> None:
+        """Build the client for the configured instance ahead of the first webhook.
+
+        Building it already fetches the server info, which checks the
+        credentials and connects to the instance, so nothing else is sent.
+        """
+        self.get()
+
+
+class PoolWarmer:
+    """Warms a JiraClientPool on a background thread, retrying until Jira answers.
+
+    `ready` is set once the pool is warm; the readiness probe reports it so
+    traffic is only routed to the app after that.
+    """
+
+    def __init__(self, pool: JiraClientPool, retry_interval: float = DEFAULT_WARM_RETRY_INTERVAL):
+        self.pool = pool
+        self.retry_interval = retry_interval
+        self.ready = threading.Event()
+        self.seconds: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="jira-pool-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self.pool.warm()
+            except Exception as e:
+                logger.warning(f"Warming the Jira client failed, retrying in {self.retry_interval}s: {e}")
+                self._stop.wait(self.retry_interval)
+                continue
+            self.seconds = time.perf_counter() - started
+            logger.info(f"Jira client warmed in {self.seconds * 1000:.0f} ms")
+            self.ready.set()
+            return
+
+
+def is_client_failure(error: Exception) -> bool:
+    """Return True if the error means the client itself must be rebuilt."""
+    from jira import JIRAError
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+
+    if isinstance(error, RequestsConnectionError):
+        return True
+    # A 403 is a permission error on one issue or project, the session itself is fine
+    return isinstance(error, JIRAError) and error.status_code == 401
+
+
+jira_client_pool = JiraClientPool()
+
+
+@timed_stage("client_acquisition")
+def get_jira_client() -> "JIRA":
+    return jira_client_pool.get()
+
+
+def invalidate_jira_client(client: Optional["JIRA"] = None) -> None:
+    jira_client_pool.invalidate(client)
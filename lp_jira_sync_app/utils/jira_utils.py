@@ -1,6 +1,17 @@
-from typing import Optional, Dict, Any
-from jira import JIRA
-from lp_jira_sync_app.utils.config import global_config
+import json
+import re
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, Tuple
+from lp_jira_sync_app.utils.config import global_config, logger
+from lp_jira_sync_app.utils.issue_index import get_issue_index
+from lp_jira_sync_app.utils.comment_index import get_comment_index
+from lp_jira_sync_app.utils.metrics import timed_stage
+from lp_jira_sync_app.utils.lookup_batcher import LookupBatcher, lookup_batch_settings, on_event_loop
+from lp_jira_sync_app.utils.transition_graph import TransitionGraphCache, DEFAULT_TTL_SECONDS
+
+if TYPE_CHECKING:
+    # The jira package is slow to import; it is loaded when the first client is built
+    from jira import JIRA
 
 JIRA_ISSUE_TEMPLETE = '''
 This issue was created from Launchpad issue {launchpad_bug_url}
@@ -17,8 +28,39 @@ Launchpad user {launchpad_username} is commented:
 {launchpad_comment}
 
 '''
+# Recovers the Launchpad bug URL from a description rendered with JIRA_ISSUE_TEMPLETE
+BUG_URL_PATTERN = re.compile(r"This issue was created from Launchpad issue (\S+)")
+# Recovers the Launchpad comment URL from a comment rendered with JIRA_COMMENT_TEMPLETE
+COMMENT_URL_PATTERN = re.compile(r"Launchpad comment URL:\s*(\S+)")
+
+# Fields each operation reads from Jira; everything else (comments, custom
+# fields, ...) is left out of the response.
+ISSUE_FIELDS = "summary,status,issuetype,project"
+# The JQL fallback also needs the description to check for an exact bug URL match
+SEARCH_FIELDS = ISSUE_FIELDS + ",description"
+WORKFLOW_FIELDS = "status,issuetype,project"
+# Without a comment index, duplicate comments are checked against the comments fetched with the issue
+COMMENT_FIELD = "comment"
+# Launchpad fields that *-changed events sync to Jira
+UPDATABLE_FIELDS = frozenset({"title", "description", "reporter", "status", "importance"})
+
+# Seconds a bug stays known to have no Jira issue (0 disables the negative cache)
+DEFAULT_MISSING_ISSUE_TTL = 600.0
+MISSING_ISSUE_TTL = float((global_config.get("app") or {}).get("missing_issue_ttl", DEFAULT_MISSING_ISSUE_TTL) or 0)
+
+# Jira caps maxResults of a search at 100
+MAX_SEARCH_RESULTS = 100
+# Results fetched per bug URL of a search
+RESULTS_PER_BUG = 10
+LOOKUP_BATCH_WINDOW, LOOKUP_BATCH_SIZE = lookup_batch_settings()
+lookup_batcher = LookupBatcher(LOOKUP_BATCH_WINDOW, LOOKUP_BATCH_SIZE)
 
-def build_jira_client() -> JIRA:
+# Rounds of learning the statuses one step further out when no route is known
+MAX_EXPLORE_DEPTH = 3
+transition_graph = TransitionGraphCache(
+    ttl=float((global_config.get("app") or {}).get("transition_cache_ttl") or DEFAULT_TTL_SECONDS))
+
+def build_jira_client() -> "JIRA":
     """Build and return a JIRA client using app configuration.
 
     Expects keys: jira_instance, jira_username, jira_token.
@@ -27,40 +69,157 @@ def build_jira_client() -> JIRA:
     server =   global_config.get("app").get("jira_instance")
     username = global_config.get("app").get("jira_username")
     token =    global_config.get("app").get("jira_token")
+    timeout =  global_config.get("app").get("jira_timeout")
+    retries =  global_config.get("app").get("jira_max_retries")
 
     if not server or not username or not token:
         raise ValueError("Jira credentials are not configured")
-    return JIRA(server=server, basic_auth=(username, token))
-
-def find_jira_issue(jira_client: JIRA, project_key: str, issue_key: str) -> Optional[dict]:
-    """Find and return a JIRA issue by project key and issue key."""
-    jql = f"project = \"{project_key}\" AND text ~ \"{issue_key}\" ORDER BY created DESC"
-    issues = jira_client.search_issues(jql, maxResults=1,json_result=False)
-    return issues[0] if issues else None
-
-def find_jira_comment(issue: str, comment_path: str) -> bool:
-    """Find if comment exists in issue."""
-    for comment in issue.fields.comment.comments:
-        if comment_path in comment.body:
-            return True
-    return False
+    from jira import JIRA
 
+    return JIRA(server=server, basic_auth=(username, token), timeout=timeout,
+                max_retries=3 if retries is None else int(retries))
 
-def create_jira_issue(jira_client: JIRA, bug_object: dict, project_config) -> Optional[dict]:
-    """Create a JIRA issue and return the issue object."""
+@timed_stage("find_jira_issue")
+def find_jira_issue(jira_client: "JIRA", project_key: str, issue_key: str,
+                    with_comments: bool = False) -> Optional[dict]:
+    """Find and return a JIRA issue by project key and Launchpad bug URL.
+
+    The local issue index is consulted first; the full-text JQL search only
+    runs on an index miss and its result is stored for the next event. A
+    search that finds nothing is remembered for MISSING_ISSUE_TTL seconds,
+    until an issue is created for the bug. Searches of concurrent lookups
+    in the same project are batched by lookup_batcher, unless the lookup
+    runs on the event loop (synchronous processing). with_comments also
+    fetches the issue's comments when there is no comment index to check
+    them against.
+    """
+    from jira import JIRAError
+
+    extra_fields = "," + COMMENT_FIELD if with_comments and not get_comment_index() else ""
+    index = get_issue_index()
+    if index:
+        jira_key = index.get(issue_key, project_key)
+        if jira_key:
+            try:
+                return jira_client.issue(jira_key, fields=ISSUE_FIELDS + extra_fields)
+            except JIRAError as e:
+                if e.status_code != 404:
+                    raise
+                # Issue was deleted or moved, forget it and search again
+                index.remove(issue_key, project_key)
+        elif MISSING_ISSUE_TTL and index.is_missing(issue_key, project_key):
+            return None
+
+    if LOOKUP_BATCH_WINDOW and not on_event_loop():
+        # Concurrent lookups of other bugs of the project share one search
+        issue = lookup_batcher.lookup(
+            (id(jira_client), project_key, extra_fields), issue_key,
+            lambda bug_urls: search_jira_issues(jira_client, project_key, bug_urls, SEARCH_FIELDS + extra_fields))
+    else:
+        issue = search_jira_issues(jira_client, project_key, [issue_key], SEARCH_FIELDS + extra_fields)[issue_key]
+    if issue is not None:
+        if index:
+            index.put(issue_key, project_key, issue.key)
+        return issue
+    if index and MISSING_ISSUE_TTL:
+        index.mark_missing(issue_key, project_key, MISSING_ISSUE_TTL)
+    return None
+
+def bug_search_jql(project_key: str, bug_urls: List[str]) -> str:
+    terms = " OR ".join(f"text ~ \"{bug_url}\"" for bug_url in bug_urls)
+    if len(bug_urls) > 1:
+        terms = f"({terms})"
+    return f"project = \"{project_key}\" AND {terms} ORDER BY created DESC"
+
+def match_bug_issues(issues, bug_urls: List[str], description) -> Dict[str, Any]:
+    """Map each bug URL to the newest issue whose description names exactly that bug, or None."""
+    found = dict.fromkeys(bug_urls)
+    # Full-text search also matches longer bug URLs (/+bug/12 vs /+bug/123)
+    patterns = [(bug_url, re.compile(re.escape(bug_url) + r"(?!\d)")) for bug_url in bug_urls]
+    for issue in issues:
+        text = description(issue) or ""
+        for bug_url, exact in patterns:
+            if found[bug_url] is None and exact.search(text):
+                found[bug_url] = issue
+    return found
+
+def search_jira_issues(jira_client: "JIRA", project_key: str, bug_urls: List[str],
+                       fields: str = SEARCH_FIELDS) -> Dict[str, Any]:
+    """Find the issues of several Launchpad bugs with one full-text JQL search.
+
+    Returns a dict mapping every bug URL to its issue or None. Bugs left
+    unmatched by a search that hit its result limit are searched one by one.
+    """
+    max_results = min(RESULTS_PER_BUG * len(bug_urls), MAX_SEARCH_RESULTS)
+    issues = jira_client.search_issues(bug_search_jql(project_key, bug_urls), maxResults=max_results,
+                                       fields=fields, json_result=False)
+    found = match_bug_issues(issues, bug_urls, lambda issue: getattr(issue.fields, "description", None))
+    if len(bug_urls) > 1 and len(issues) >= max_results:
+        for bug_url in [bug_url for bug_url, issue in found.items() if issue is None]:
+            found.update(search_jira_issues(jira_client, project_key, [bug_url], fields))
+    return found
+
+def iter_issue_pages(jira_client: "JIRA", jql: str, fields: str, batch_size: int = 100) -> Iterator[List[dict]]:
+    """Yield pages of raw issue JSON matching jql, batch_size issues at a time."""
+    if is_cloud(jira_client):
+        token = None
+        while True:
+            page = jira_client.enhanced_search_issues(
+                jql, nextPageToken=token, maxResults=batch_size, fields=fields, json_result=True)
+            yield page.get("issues") or []
+            token = page.get("nextPageToken")
+            if not token or page.get("isLast"):
+                return
+    else:
+        start = 0
+        while True:
+            page = jira_client.search_issues(
+                jql, startAt=start, maxResults=batch_size, fields=fields, json_result=True)
+            issues = page.get("issues") or []
+            yield issues
+            start += len(issues)
+            if not issues or start >= page.get("total", 0):
+                return
+
+def find_jira_comment(jira_client: "JIRA", issue, comment_path: str) -> bool:
+    """Find if comment exists in issue.
+
+    With the comment index this is a single local lookup; an issue synced
+    before the index existed has its Jira comments scanned once first.
+    """
+    index = get_comment_index()
+    if not index:
+        comments = getattr(getattr(issue.fields, COMMENT_FIELD, None), "comments", None)
+        if comments is None:
+            comments = jira_client.comments(issue.key)
+        return any(comment_path in comment.body for comment in comments)
+
+    if not index.is_indexed(issue.key):
+        rebuild_comment_index(jira_client, issue.key)
+    return index.contains(issue.key, f"{global_config.get('app').get('launchpad_url')}{comment_path}")
+
+def rebuild_comment_index(jira_client: "JIRA", issue_key: str) -> int:
+    """Record the Launchpad comments already present on a Jira issue. Returns how many were found."""
+    comment_urls = []
+    for comment in jira_client.comments(issue_key):
+        match = COMMENT_URL_PATTERN.search(comment.body or "")
+        if match:
+            comment_urls.append(match.group(1))
+    get_comment_index().mark_indexed(issue_key, comment_urls)
+    return len(comment_urls)
+
+
+def build_issue_fields(bug_object: dict, project_config) -> Dict[str, Any]:
+    """Return the Jira fields for a new issue mirroring a Launchpad bug."""
 
     sync_description = project_config.get("sync_description",False)
     components = project_config.get("components") or []
-    status_mapping = project_config.get("status_mapping")
     severity_mapping = project_config.get("severity_mapping")
     issue_type = project_config.get("jira_issue_type")
     project_key = project_config.get("jira_project_key")
     epic_key = project_config.get("jira_epic_key") or ''
     importance = bug_object.get("new").get("importance")
-    status = bug_object.get("new").get("status")
-    bug_id = bug_object.get("bug").split("/")[-1]
-    target =  bug_object.get("target")
-    bug_url = f"{global_config.get("app").get("launchpad_url")}{target}/+bug/{bug_id}"
+    bug_url = launchpad_bug_url(bug_object)
     description = JIRA_ISSUE_TEMPLETE.format(
         launchpad_bug_url=bug_url,
         launchpad_username=bug_object.get("new").get("reporter").lstrip("/"),
@@ -76,7 +235,7 @@ def create_jira_issue(jira_client: JIRA, bug_object: dict, project_config) -> Op
 
     }
 
-    if severity_mapping and isinstance(severity_mapping, dict):
+    if severity_mapping and isinstance(severity_mapping, Mapping):
         importance = severity_mapping.get(importance) or "Medium"
         fields["priority"] = {"name": importance}
 
@@ -85,67 +244,209 @@ def create_jira_issue(jira_client: JIRA, bug_object: dict, project_config) -> Op
         fields["components"] = jira_componenta
     if epic_key:
         fields["parent"] = {"key": epic_key}
+    return fields
 
-    issue = jira_client.create_issue(fields=fields)
-    if status_mapping and isinstance(status_mapping, dict):
-        status = status_mapping.get(status) or "To Do"
-        transition_to_status(jira_client, issue, status)
+def mapped_status(bug_object: dict, project_config) -> Optional[str]:
+    """Return the Jira status for the bug's Launchpad status, or None without a status_mapping."""
+    status_mapping = project_config.get("status_mapping")
+    if status_mapping and isinstance(status_mapping, Mapping):
+        return status_mapping.get(bug_object.get("new").get("status")) or "To Do"
+    return None
+
+def launchpad_bug_url(bug_object: dict) -> str:
+    bug_id = bug_object.get("bug").split("/")[-1]
+    target = bug_object.get("target")
+    return f"{global_config.get("app").get("launchpad_url")}{target}/+bug/{bug_id}"
+
+@timed_stage("create_jira_issue")
+def create_jira_issue(jira_client: "JIRA", bug_object: dict, project_config) -> Optional[dict]:
+    """Create a JIRA issue and return the issue object."""
+
+    fields = build_issue_fields(bug_object, project_config)
+    # The created issue is not fetched back; a status change below refreshes only what it needs
+    issue = jira_client.create_issue(fields=fields, prefetch=False)
+    index = get_issue_index()
+    if index:
+        index.put(launchpad_bug_url(bug_object), fields["project"]["key"], issue.key)
+    comment_index = get_comment_index()
+    if comment_index:
+        # A new issue has no comments, its first comment event need not scan them
+        comment_index.mark_indexed(issue.key, [])
+    status = mapped_status(bug_object, project_config)
+    if status:
+        transition_to_status(jira_client, issue, status, current_status=issue_status(issue))
     return issue
 
-def transition_to_status(jira: JIRA, issue, desired_status: str) -> bool:
+def issue_status(issue) -> Optional[str]:
+    """Return the status name of an already fetched issue, or None if it wasn't fetched."""
+    status = getattr(getattr(issue, "fields", None), "status", None)
+    return getattr(status, "name", None)
+
+def _workflow_key(issue) -> tuple:
+    fields = getattr(issue, "fields", None)
+    project = getattr(getattr(fields, "project", None), "key", None) or issue.key.split("-")[0]
+    issue_type = getattr(getattr(fields, "issuetype", None), "name", None) or ""
+    return project, issue_type
+
+def sample_issue_jql(workflow: tuple, status: str) -> str:
+    """JQL for an issue of the workflow's project and issue type in status."""
+    project, issue_type = workflow
+    jql = f"project = \"{project}\" AND status = \"{status}\""
+    return f"{jql} AND issuetype = \"{issue_type}\"" if issue_type else jql
+
+def explore_route(jira: "JIRA", workflow: tuple, from_status: str, to_status: str) -> Optional[List[Tuple[str, str]]]:
+    """Learn the edges of statuses the bot has not visited yet and look for a route again.
+
+    Jira only lists the transitions of an issue's current status, so the edges
+    of an unvisited status are read from another issue of the workflow that is
+    in it. Every round learns the statuses one step further out, for at most
+    MAX_EXPLORE_DEPTH rounds.
     """
-    Transition issue to desired_status if a direct transition exists.
+    tried = set()
+    for _ in range(MAX_EXPLORE_DEPTH):
+        statuses = [status for status in transition_graph.unexplored(workflow, from_status) if status not in tried]
+        if not statuses:
+            return None
+        for status in statuses:
+            tried.add(status)
+            sample = jira.search_issues(sample_issue_jql(workflow, status), maxResults=1, fields="status",
+                                        expand="transitions")
+            if sample and sample[0].raw.get("transitions") is not None:
+                transition_graph.learn(workflow, status, sample[0].raw["transitions"])
+        path = transition_graph.route(workflow, from_status, to_status)
+        if path is not None:
+            return path
+    return None
+
+@timed_stage("transition_to_status")
+def transition_to_status(jira: "JIRA", issue, desired_status: str, current_status: Optional[str] = None) -> bool:
+    """
+    Transition issue to desired_status, going through intermediate statuses if needed.
+    The route is the shortest path over the cached workflow graph, exploring statuses
+    the bot never visited when no route is known; the issue is only refreshed when
+    the caller doesn't know its current status.
     Returns True if transitioned or already in the desired status.
     """
-    issue = jira.issue(issue.key)  # refresh
-    if issue.fields.status.name == desired_status:
+    from jira import JIRAError
+
+    workflow = None
+    if current_status is None:
+        # One request returns the status and the transitions available from it
+        issue = jira.issue(issue.key, fields=WORKFLOW_FIELDS, expand="transitions")  # refresh
+        current_status = issue.fields.status.name
+        workflow = _workflow_key(issue)
+        if current_status != desired_status and issue.raw.get("transitions") is not None:
+            transition_graph.learn(workflow, current_status, issue.raw["transitions"])
+    if current_status == desired_status:
         return True
 
-    for t in jira.transitions(issue):
-        if t["to"]["name"] == desired_status:
-            jira.transition_issue(issue, transition=t["id"])
+    workflow = workflow or _workflow_key(issue)
+    for attempt in range(2):
+        if transition_graph.edges(workflow, current_status) is None:
+            transition_graph.learn(workflow, current_status, jira.transitions(issue))
+        path = transition_graph.route(workflow, current_status, desired_status) or \
+            explore_route(jira, workflow, current_status, desired_status)
+        if path is None:
+            return False  # not reachable in the explored part of the workflow
+
+        try:
+            for transition_id, status in path:
+                jira.transition_issue(issue, transition=transition_id)
+                current_status = status
             return True
-    return False  # not directly reachable from current state
+        except JIRAError as e:
+            # The cached workflow is stale, relearn it from the issue's real status
+            logger.warning(f"Transition of {issue.key} to {desired_status} failed: {e}")
+            transition_graph.invalidate(workflow)
+            if attempt:
+                raise
+            current_status = jira.issue(issue.key, fields="status").fields.status.name
+            if current_status == desired_status:
+                return True
+    return False
 
-def create_jira_comment(jira_client: JIRA, issue, bug_object):
-    """Create a JIRA comment and return the comment object."""
+def build_comment_body(bug_object: dict) -> Tuple[str, str]:
+    """Return the Launchpad comment URL and the Jira comment text for a comment event."""
+    comment_url = f"{global_config.get("app").get("launchpad_url")}{bug_object.get("bug_comment")}"
     comment_templete = JIRA_COMMENT_TEMPLETE.format(
         launchpad_username=bug_object.get("new").get("commenter").lstrip("/"),
         launchpad_comment=bug_object.get("new").get("content"),
-        launchpad_comment_url=f"{global_config.get("app").get("launchpad_url")}{bug_object.get("bug_comment")}"
+        launchpad_comment_url=comment_url
     )
+    return comment_url, comment_templete
+
+@timed_stage("create_jira_comment")
+def create_jira_comment(jira_client: "JIRA", issue, bug_object):
+    """Create a JIRA comment and return the comment object."""
+    comment_url, comment_templete = build_comment_body(bug_object)
     jira_client.add_comment(issue, comment_templete)
+    index = get_comment_index()
+    if index:
+        index.add(issue.key, comment_url)
+
+def build_issue_edits(bug_object: dict, project_config, changed_fields=None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Return the Jira field edits and the desired status (or None) for changed Launchpad fields.
 
-def update_jira_issue(jira_client: JIRA, issue, bug_object, project_config):
-    """Update a JIRA issue and return the issue object."""
+    changed_fields defaults to the one named by the action.
+    """
 
-    updatable_fields = ["title", "description", "reporter", "status", "importance"]
     sync_description = project_config.get("sync_description", False)
-    updated_field = bug_object.get("action").split("-")[0]
+    if changed_fields is None:
+        changed_fields = {bug_object.get("action").split("-")[0]}
+    changed_fields = UPDATABLE_FIELDS.intersection(changed_fields)
     bug_id = bug_object.get("bug").split("/")[-1]
     target = bug_object.get("target")
     bug_url = f"{global_config.get("app").get("launchpad_url")}{target}/+bug/{bug_id}"
-    if updated_field in updatable_fields:
-        if updated_field == "title":
-            issue.update(summary=bug_object.get("new").get("title"))
-        elif updated_field in [ "description", "reporter"] and sync_description:
-            description = JIRA_ISSUE_TEMPLETE.format(
-                launchpad_bug_url=bug_url,
-                launchpad_username=bug_object.get("new").get("reporter").lstrip("/"),
-                launchpad_bug_description=bug_object.get("new").get("description")
-            )
-            issue.update(description=description)
-        elif updated_field == "status":
-            status_mapping = project_config.get("status_mapping")
-            if status_mapping and isinstance(status_mapping, dict):
-                status = bug_object.get("new").get("status")
-                status = status_mapping.get(status) or "To Do"
-                transition_to_status(jira_client, issue, status)
-        elif updated_field == "importance":
-            severity_mapping = project_config.get("severity_mapping")
-            if severity_mapping and isinstance(severity_mapping, dict):
-                severity = bug_object.get("new").get("importance")
-                severity = severity_mapping.get(severity) or "Medium"
-            issue.update(priority={"name": severity})
+    edits = {}
+    desired_status = None
+    if "title" in changed_fields:
+        edits["summary"] = bug_object.get("new").get("title")
+    if changed_fields & {"description", "reporter"} and sync_description:
+        edits["description"] = JIRA_ISSUE_TEMPLETE.format(
+            launchpad_bug_url=bug_url,
+            launchpad_username=bug_object.get("new").get("reporter").lstrip("/"),
+            launchpad_bug_description=bug_object.get("new").get("description")
+        )
+    if "status" in changed_fields:
+        status_mapping = project_config.get("status_mapping")
+        if status_mapping and isinstance(status_mapping, Mapping):
+            status = bug_object.get("new").get("status")
+            desired_status = status_mapping.get(status) or "To Do"
+    if "importance" in changed_fields:
+        severity_mapping = project_config.get("severity_mapping")
+        if severity_mapping and isinstance(severity_mapping, Mapping):
+            severity = bug_object.get("new").get("importance")
+            edits["priority"] = {"name": severity_mapping.get(severity) or "Medium"}
+    return edits, desired_status
+
+@timed_stage("update_jira_issue")
+def update_jira_issue(jira_client: "JIRA", issue, bug_object, project_config, changed_fields=None):
+    """Update a JIRA issue and return the issue object.
+
+    changed_fields is the set of Launchpad fields to sync and defaults to the
+    one named by the action. All field edits go out in a single update and at
+    most one status transition follows.
+    """
+    edits, desired_status = build_issue_edits(bug_object, project_config, changed_fields)
+    if edits:
+        edit_issue_fields(jira_client, issue.key, edits)
+    if desired_status:
+        transition_to_status(jira_client, issue, desired_status, current_status=issue_status(issue))
     return issue
 
+# The two helpers below are the only places that use private attributes of the
+# JIRA client. They are written against jira 3.10.5 (pinned in requirements.txt)
+# and test_utils_jira checks the attributes still exist.
+
+def edit_issue_fields(jira_client: "JIRA", issue_key: str, fields: Dict[str, Any]) -> None:
+    """Edit issue fields with a single PUT.
+
+    jira 3.10.5 has no public fields-only edit: Issue.update reloads the whole
+    issue, every field and comment included, after each edit, and nothing here
+    reads it back. So the PUT goes through the client's session directly.
+    """
+    jira_client._session.put(jira_client._get_url(f"issue/{issue_key}"), data=json.dumps({"fields": fields}))
+
+def is_cloud(jira_client: "JIRA") -> bool:
+    """True for Jira Cloud, read from the server info the client fetched when it was built."""
+    return jira_client._is_cloud
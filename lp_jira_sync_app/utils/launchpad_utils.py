@@ -1,12 +1,27 @@
+import time
+from typing import TYPE_CHECKING, Optional
+
 from fastapi import HTTPException
-from jira import JIRA
 
 from lp_jira_sync_app.utils.config import logger, global_config
 from lp_jira_sync_app.utils.jira_utils import find_jira_issue, create_jira_issue, create_jira_comment, \
-    update_jira_issue, find_jira_comment
+    update_jira_issue, find_jira_comment, launchpad_bug_url
+from lp_jira_sync_app.utils.jira_clients import is_client_failure, invalidate_jira_client, get_jira_client
+from lp_jira_sync_app.utils.coalescer import ChangeCoalescer
+from lp_jira_sync_app.utils.outbox import get_outbox
+from lp_jira_sync_app.utils.circuit_breaker import jira_breaker
+from lp_jira_sync_app.utils.metrics import tracked_event
+from lp_jira_sync_app.utils.log import summarize_payload
+from lp_jira_sync_app.utils import async_jira
+
+if TYPE_CHECKING:
+    from jira import JIRA
 
+DEFAULT_COALESCE_MAX_DELAY = 10
 
-def sync_launchpad_action(payload: dict, jira_client: JIRA, project_config: dict):
+
+@tracked_event
+def sync_launchpad_action(payload: dict, jira_client: "JIRA", project_config: dict):
     action = payload.get("action")
     bug_id = payload.get("bug").split("/")[-1]
     target = payload.get("target")
@@ -15,7 +30,8 @@ def sync_launchpad_action(payload: dict, jira_client: JIRA, project_config: dict
     sync_comments = project_config.get("sync_comments",False)
     try:
         if action == "created":
-            issue = find_jira_issue(jira_client, project_in_jira, bug_url)
+            issue = find_jira_issue(jira_client, project_in_jira, bug_url,
+                                    with_comments=sync_comments and "bug_comment" in payload)
 
             # Handle comment creation on an existing issue
             if "bug_comment" in payload:
@@ -26,7 +42,7 @@ def sync_launchpad_action(payload: dict, jira_client: JIRA, project_config: dict
                     logger.error(f"Jira issue not found for Launchpad Bug {bug_url}")
                     raise HTTPException(status_code=404)
 
-                if find_jira_comment(issue, payload.get("bug_comment")):
+                if find_jira_comment(jira_client, issue, payload.get("bug_comment")):
                     logger.error(
                         f"Jira issue already has comment for Launchpad Bug comment {payload.get("bug_comment")}")
                     raise HTTPException(status_code=404)
@@ -43,6 +59,10 @@ def sync_launchpad_action(payload: dict, jira_client: JIRA, project_config: dict
             return
 
         if "-changed" in action:
+            # Merge with other changes to this bug and apply them together later
+            if coalesce_change(payload, project_config):
+                return
+
             issue = find_jira_issue(jira_client, project_in_jira, bug_url)
             if not issue:
                 logger.error(f"Jira issue not found for edit event for Launchpad Bug {bug_url}")
@@ -55,15 +75,193 @@ def sync_launchpad_action(payload: dict, jira_client: JIRA, project_config: dict
         raise
     except Exception as e:
         # Convert unexpected JIRA errors to 500
-        logger.error(f"Error during jira operation {e} , Payload: {payload}, Project Config: {project_config}")
-        raise HTTPException(status_code=500)
+        if is_client_failure(e):
+            invalidate_jira_client(jira_client)
+        logger.error(f"Error during jira operation for Launchpad Bug {bug_url}: {e}",
+                     extra={"payload": summarize_payload(payload), "jira_project": project_in_jira})
+        raise HTTPException(status_code=500) from e
+
+
+@tracked_event
+async def sync_launchpad_action_async(payload: dict, client: "async_jira.AsyncJiraClient", project_config: dict):
+    """Async counterpart of sync_launchpad_action using the httpx based Jira client.
+
+    The event loop keeps the Jira requests of many webhooks in flight at
+    once instead of blocking a thread per request.
+    """
+    action = payload.get("action")
+    bug_url = launchpad_bug_url(payload)
+    project_in_jira = project_config.get("jira_project_key")
+    sync_comments = project_config.get("sync_comments", False)
+    try:
+        if action == "created":
+            issue = await async_jira.find_jira_issue(client, project_in_jira, bug_url,
+                                                     with_comments=sync_comments and "bug_comment" in payload)
+
+            if "bug_comment" in payload:
+                if not sync_comments:
+                    return
 
+                if not issue:
+                    logger.error(f"Jira issue not found for Launchpad Bug {bug_url}")
+                    raise HTTPException(status_code=404)
 
+                if await async_jira.find_jira_comment(client, issue, payload.get("bug_comment")):
+                    logger.error(
+                        f"Jira issue already has comment for Launchpad Bug comment {payload.get("bug_comment")}")
+                    raise HTTPException(status_code=404)
 
+                await async_jira.create_jira_comment(client, issue, payload)
+                return
 
+            if issue:
+                logger.error(f"Jira issue already exists for Launchpad Bug {bug_url}")
+                raise HTTPException(status_code=404)
 
+            await async_jira.create_jira_issue(client, payload, project_config)
+            return
 
+        if "-changed" in action:
+            # The coalescer applies merged changes with the synchronous client
+            if coalesce_change(payload, project_config):
+                return
 
+            issue = await async_jira.find_jira_issue(client, project_in_jira, bug_url)
+            if not issue:
+                logger.error(f"Jira issue not found for edit event for Launchpad Bug {bug_url}")
+                raise HTTPException(status_code=404)
+
+            await async_jira.update_jira_issue(client, issue, payload, project_config)
+            return
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        if async_jira.is_async_client_failure(e):
+            await async_jira.invalidate_async_jira_client(client)
+        logger.error(f"Error during jira operation for Launchpad Bug {bug_url}: {e}",
+                     extra={"payload": summarize_payload(payload), "jira_project": project_in_jira})
+        raise HTTPException(status_code=500) from e
+
+
+def coalesce_change(payload: dict, project_config: dict, outbox_id: Optional[int] = None) -> bool:
+    """Hand a *-changed event to the coalescer if the project enables it; returns True if it did."""
+    window = float(project_config.get("coalesce_window_seconds") or 0)
+    if window <= 0 or "-changed" not in payload.get("action"):
+        return False
+    max_delay = float(project_config.get("coalesce_max_delay_seconds") or DEFAULT_COALESCE_MAX_DELAY)
+    key = (project_config.get("jira_project_key"), launchpad_bug_url(payload))
+    change_coalescer.add(key, payload, project_config, window, max_delay, outbox_id)
+    return True
+
+
+def process_launchpad_event(payload: dict, project_config: dict, outbox_id: Optional[int] = None):
+    """Sync a queued Launchpad event outside the request.
+
+    There is no caller to return an HTTP status to, so failures are logged.
+    Events stored in the outbox are removed on success and scheduled for a
+    retry or dead-lettered on failure. Coalesced changes stay in the outbox
+    until their merged update is flushed.
+    """
+    outbox = get_outbox() if outbox_id is not None else None
+    if outbox:
+        earlier = outbox.earlier_ids(outbox_id)
+        # Changes may join the older changes of their bug waiting in the coalescer
+        if earlier and not ("-changed" in payload.get("action") and change_coalescer.holds(earlier)):
+            # An older event of this bug is waiting for a retry, keep the order
+            outbox.defer(outbox_id)
+            return
+        if coalesce_change(payload, project_config, outbox_id):
+            return
+    if jira_breaker and not jira_breaker.allow():
+        if outbox:
+            # Jira is failing; park the event instead of waiting for timeouts
+            outbox.postpone(outbox_id, max(jira_breaker.retry_after(), 1.0))
+            return
+        # Nowhere to park it: hold the lane, new webhooks get a 503 meanwhile
+        _wait_for_breaker()
+
+    try:
+        jira_client = get_jira_client()
+        sync_launchpad_action(payload, jira_client, project_config)
+    except HTTPException as e:
+        error = e.__cause__
+        if error is None:
+            # Not found / already synced, retrying would not change anything
+            logger.warning(
+                f"Launchpad event {payload.get('action')} for {payload.get('bug')} was not synced ({e.status_code})")
+        elif outbox:
+            _retry_later(outbox, outbox_id, payload, error)
+            return
+    except Exception as e:
+        logger.error(f"Failed to process Launchpad event: {e}")
+        if outbox:
+            _retry_later(outbox, outbox_id, payload, e)
+            return
+    if outbox:
+        outbox.complete(outbox_id)
+
+
+def _wait_for_breaker():
+    """Block until the Jira circuit breaker lets a request through."""
+    while not jira_breaker.allow():
+        time.sleep(max(jira_breaker.retry_after(), 1.0))
+
+
+def _retry_later(outbox, outbox_id: int, payload: dict, error: Exception):
+    delay = outbox.fail(outbox_id, error)
+    if delay is None:
+        logger.error(f"Launchpad event {payload.get('action')} for {payload.get('bug')} moved to dead letters: {error}")
+    else:
+        logger.warning(
+            f"Launchpad event {payload.get('action')} for {payload.get('bug')} will be retried in {delay:.1f}s")
+
+
+@tracked_event
+def flush_coalesced_changes(payload: dict, changed_fields: set, project_config: dict, outbox_ids=()):
+    """Apply a burst of *-changed events for one bug with one lookup and one update.
+
+    The outbox events merged into the update are completed once it is
+    applied, and retried or dead-lettered if it fails.
+    """
+    bug_url = launchpad_bug_url(payload)
+    outbox = get_outbox() if outbox_ids else None
+    if outbox and outbox.has_earlier(outbox_ids[0]):
+        # An older event of this bug failed meanwhile; replay these after it
+        for outbox_id in outbox_ids:
+            outbox.defer(outbox_id)
+        return
+    if jira_breaker and not jira_breaker.allow():
+        if not outbox:
+            # Launchpad already got its answer; hold the changes until Jira takes requests again
+            logger.warning(f"Jira circuit breaker is open, delaying changes for Launchpad Bug {bug_url}")
+            change_coalescer.requeue((project_config.get("jira_project_key"), bug_url), payload, changed_fields,
+                                     project_config, max(jira_breaker.retry_after(), 1.0))
+            return
+        for outbox_id in outbox_ids:
+            outbox.postpone(outbox_id, max(jira_breaker.retry_after(), 1.0))
+        return
+
+    jira_client = None
+    try:
+        jira_client = get_jira_client()
+        issue = find_jira_issue(jira_client, project_config.get("jira_project_key"), bug_url)
+        if not issue:
+            logger.error(f"Jira issue not found for edit event for Launchpad Bug {bug_url}")
+        else:
+            update_jira_issue(jira_client, issue, payload, project_config, changed_fields)
+    except Exception as e:
+        if jira_client is not None and is_client_failure(e):
+            invalidate_jira_client(jira_client)
+        if not outbox:
+            raise
+        logger.error(f"Failed to flush changes for Launchpad Bug {bug_url}: {e}")
+        for outbox_id in outbox_ids:
+            _retry_later(outbox, outbox_id, payload, e)
+        return
+    for outbox_id in outbox_ids:
+        outbox.complete(outbox_id)
 
 
+change_coalescer = ChangeCoalescer(flush_coalesced_changes)
 
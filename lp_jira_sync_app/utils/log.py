@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_FIELD_CHARS = 2000
+DEFAULT_REPEAT_INTERVAL = 60.0
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def truncate(value: Any, limit: int) -> Any:
+    """Shorten long strings, noting how much was dropped."""
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}... ({len(value) - limit} more chars)"
+    return value
+
+
+def summarize_payload(payload: Optional[dict]) -> Dict[str, Any]:
+    """Identifying fields of a webhook payload, without titles, descriptions or comments."""
+    payload = payload or {}
+    summary = {key: payload.get(key) for key in ("action", "bug", "target", "bug_comment") if key in payload}
+    summary["new_fields"] = sorted(payload.get("new") or {})
+    return summary
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; string values are cut to max_field_chars."""
+
+    def __init__(self, max_field_chars: int = DEFAULT_MAX_FIELD_CHARS):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": truncate(record.getMessage(), self.max_field_chars),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = truncate(value, self.max_field_chars)
+        if record.exc_info:
+            entry["exception"] = truncate(self.formatException(record.exc_info), self.max_field_chars)
+        return json.dumps(entry, default=str)
+
+
+class RepeatFilter(logging.Filter):
+    """Lets an identical error through once per interval.
+
+    The next record that passes carries the number of copies dropped in
+    between as `suppressed`. Records below ERROR are never filtered.
+    """
+
+    def __init__(self, interval: float = DEFAULT_REPEAT_INTERVAL, maxsize: int = 1000):
+        super().__init__()
+        self.interval = interval
+        self.maxsize = maxsize
+        self._seen: Dict[Tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR or self.interval <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            if seen is not None and seen[1]:
+                record.suppressed = seen[1]
+            if seen is None and len(self._seen) >= self.maxsize:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+        return True
+
+
+class RecordQueueHandler(QueueHandler):
+    """Enqueues records as they are; the listener thread formats them.
+
+    The stock QueueHandler formats every record in the logging thread so it
+    can cross process boundaries, which a thread-only queue doesn't need.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def stop_queue_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_queue_logging)
+
+
+def configure_queue_logging(log: logging.Logger, handler: logging.Handler,
+                            repeat_interval: float = DEFAULT_REPEAT_INTERVAL) -> QueueListener:
+    """Route log's records through a queue to handler on a background thread.
+
+    Callers only filter and enqueue; formatting and the write happen on the
+    listener thread. Calling it again replaces the previous listener.
+    """
+    global _listener
+    stop_queue_logging()
+    for old in list(log.handlers):
+        if isinstance(old, QueueHandler):
+            log.removeHandler(old)
+
+    records = queue.SimpleQueue()
+    queue_handler = RecordQueueHandler(records)
+    queue_handler.addFilter(RepeatFilter(repeat_interval))
+    log.addHandler(queue_handler)
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
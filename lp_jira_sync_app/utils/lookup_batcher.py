@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+from lp_jira_sync_app.utils.config import global_config
+from lp_jira_sync_app.utils.metrics import registry, Histogram
+
+DEFAULT_WINDOW_MS = 5.0
+DEFAULT_MAX_SIZE = 10
+
+LOOKUP_BATCH_SIZE = registry.register(Histogram(
+    "lp_jira_sync_lookup_batch_size", "Bug URLs resolved by one batched Jira issue search",
+    buckets=(1, 2, 5, 10, 20, 50)))
+
+Search = Callable[[List[str]], Dict[str, object]]
+AsyncSearch = Callable[[List[str]], Awaitable[Dict[str, object]]]
+
+
+class _Batch:
+    __slots__ = ("bug_urls", "full", "done", "results", "error")
+
+    def __init__(self, full, done):
+        self.bug_urls: List[str] = []
+        self.full = full
+        self.done = done
+        self.results: Dict[str, object] = {}
+        self.error: Optional[BaseException] = None
+
+
+class LookupBatcher:
+    """Groups concurrent issue lookups of different bugs into one search.
+
+    The first thread looking up a bug for a key (Jira client and project)
+    opens a batch. Other threads with the same key join it, for up to
+    `window` seconds or until `max_size` bugs are in it. The first thread
+    then runs `search` for all of them and every thread gets the result for
+    its own bug, or the search's exception.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW_MS / 1000, max_size: int = DEFAULT_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._open: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable, bug_url: str, search: Search):
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(threading.Event(), threading.Event())
+            if bug_url not in batch.bug_urls:
+                batch.bug_urls.append(bug_url)
+            if len(batch.bug_urls) >= self.max_size:
+                del self._open[key]
+                batch.full.set()
+
+        if not leader:
+            batch.done.wait()
+        else:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            LOOKUP_BATCH_SIZE.observe(len(batch.bug_urls))
+            try:
+                batch.results = search(batch.bug_urls)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(bug_url)
+
+
+class AsyncLookupBatcher:
+    """LookupBatcher for coroutines running on one event loop."""
+
+    def __init__(self, window: float = DEFAULT_WINDOW_MS / 1000, max_size: int = DEFAULT_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._open: Dict[Hashable, _Batch] = {}
+
+    async def lookup(self, key: Hashable, bug_url: str, search: AsyncSearch):
+        batch = self._open.get(key)
+        leader = batch is None
+        if leader:
+            batch = self._open[key] = _Batch(asyncio.Event(), asyncio.Event())
+        if bug_url not in batch.bug_urls:
+            batch.bug_urls.append(bug_url)
+        if len(batch.bug_urls) >= self.max_size:
+            del self._open[key]
+            batch.full.set()
+
+        if not leader:
+            await batch.done.wait()
+        else:
+            try:
+                try:
+                    await asyncio.wait_for(batch.full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                LOOKUP_BATCH_SIZE.observe(len(batch.bug_urls))
+                batch.results = await search(batch.bug_urls)
+            except BaseException as e:
+                # Also wakes the other callers when this one is cancelled
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                batch.error = e
+            finally:
+                batch.done.set()
+        if batch.error is not None:
+            if not leader and isinstance(batch.error, asyncio.CancelledError):
+                raise RuntimeError(f"Batched issue lookup of {bug_url} was cancelled")
+            raise batch.error
+        return batch.results.get(bug_url)
+
+
+def on_event_loop() -> bool:
+    """True when called from the thread running an asyncio event loop.
+
+    LookupBatcher must not be used there: waiting for the batch window would
+    block the loop, and with it every other lookup that could have joined.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def lookup_batch_settings() -> tuple:
+    """Return (window seconds, max size) from app config; a window of 0 disables batching."""
+    app_config = global_config.get("app") or {}
+    window_ms = float(app_config.get("lookup_batch_window_ms", DEFAULT_WINDOW_MS) or 0)
+    return window_ms / 1000, int(app_config.get("lookup_batch_size") or DEFAULT_MAX_SIZE)
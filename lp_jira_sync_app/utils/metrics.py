@@ -0,0 +1,252 @@
+import bisect
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """Gauge that is either set directly or read from a callback at scrape time.
+
+    A callback returns a number, or a list of (label values, number) pairs.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (), callback: Callable = None):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    @contextmanager
+    def track(self, *labels: str):
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            value = self.callback()
+            samples = value if isinstance(value, list) else [((), value)]
+        else:
+            with self._lock:
+                samples = sorted(self._values.items())
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (non cumulative, +Inf last), then sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in snapshot:
+            names = self.label_names + ("le",)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric, replacing one with the same name (e.g. after a module reload)."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "lp_jira_sync_stage_seconds", "Time spent in each webhook pipeline stage", ["stage"]))
+JIRA_REQUESTS = registry.register(Counter(
+    "lp_jira_sync_jira_requests_total", "HTTP requests sent to Jira by webhook action type and operation",
+    ["action", "operation"]))
+WEBHOOKS = registry.register(Counter(
+    "lp_jira_sync_webhooks_total", "Webhooks accepted by action type", ["action"]))
+IN_FLIGHT = registry.register(Gauge(
+    "lp_jira_sync_events_in_flight", "Events currently being synced to Jira"))
+
+
+# Action type of the event the current thread or task is syncing, used to label Jira requests
+_current_action: ContextVar[Optional[str]] = ContextVar("current_action", default=None)
+
+
+def timed_stage(stage: str):
+    """Decorator recording the duration of every call in lp_jira_sync_stage_seconds."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+        return wrapper
+    return decorator
+
+
+def action_type(payload: dict) -> str:
+    """Short label for a webhook: "bug-created", "comment-created" or the *-changed action."""
+    action = payload.get("action") or "unknown"
+    if action == "created":
+        return "comment-created" if "bug_comment" in payload else "bug-created"
+    return action
+
+
+def tracked_event(func):
+    """Decorator for functions syncing one webhook payload (their first argument).
+
+    Counts the event as in flight while it runs and labels the Jira requests
+    it makes with its action type. Coroutine functions are supported too.
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(payload, *args, **kwargs):
+            token = _current_action.set(action_type(payload))
+            IN_FLIGHT.inc()
+            try:
+                return await func(payload, *args, **kwargs)
+            finally:
+                IN_FLIGHT.dec()
+                _current_action.reset(token)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(payload, *args, **kwargs):
+        token = _current_action.set(action_type(payload))
+        IN_FLIGHT.inc()
+        try:
+            return func(payload, *args, **kwargs)
+        finally:
+            IN_FLIGHT.dec()
+            _current_action.reset(token)
+    return wrapper
+
+
+def jira_operation(method: str, url: str) -> str:
+    """Classify a Jira REST call, e.g. "GET issue/transitions" or "POST search"."""
+    parts = [p for p in urlsplit(url).path.split("/") if p]
+    if "api" in parts:
+        parts = parts[parts.index("api") + 2:]
+    # Drop issue keys and ids so the label set stays small
+    resource = "/".join(p for p in parts if not any(c.isdigit() for c in p)) or "root"
+    return f"{method} {resource}"
+
+
+def count_jira_request(request) -> None:
+    """Count a requests or httpx request about to be sent to Jira."""
+    JIRA_REQUESTS.inc(_current_action.get() or "none", jira_operation(request.method, str(request.url)))
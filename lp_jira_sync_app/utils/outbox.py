@@ -0,0 +1,285 @@
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Optional
+
+from lp_jira_sync_app.utils.config import global_config, logger, freeze
+from lp_jira_sync_app.utils.state_db import StateDB, get_state_db
+
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BASE_DELAY = 2.0
+DEFAULT_MAX_DELAY = 600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bug_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    project_config TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_bug ON outbox (bug_key, id);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    bug_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    project_config TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+# Entry states: "queued" is sitting in (or running on) a worker lane,
+# "pending" waits in the database until next_attempt_at.
+QUEUED = "queued"
+PENDING = "pending"
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the delay requested by a Retry-After header on the error's response, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Throttling, server errors and network failures are worth retrying; anything else is not."""
+    from jira import JIRAError
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+    if isinstance(error, (RequestsConnectionError, Timeout)):
+        return True
+    if isinstance(error, JIRAError):
+        return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempts: int, base: float = DEFAULT_BASE_DELAY, cap: float = DEFAULT_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempts))
+
+
+class Outbox:
+    """Durable store of accepted webhook events until they are synced to Jira.
+
+    Failed events are retried with backoff and jitter, honouring Retry-After.
+    Events of the same bug are released strictly in order: an event is only
+    handed out while no older event of its bug is still in the outbox.
+    Events that fail permanently move to the dead-letter table.
+    """
+
+    def __init__(self, db: StateDB, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self._db = db
+        self.max_attempts = max_attempts
+        db.ensure_schema(SCHEMA)
+
+    def add(self, payload: dict, project_config, delay: float = 0.0, state: Optional[str] = None) -> int:
+        """Store an accepted event.
+
+        With a delay (or state=PENDING) it is parked for the poller instead of
+        queued for the workers.
+        """
+        if state is None:
+            state = PENDING if delay else QUEUED
+        cursor = self._db.execute(
+            "INSERT INTO outbox (bug_key, payload, project_config, state, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+            (payload.get("bug") or "", json.dumps(payload), json.dumps(project_config, default=dict),
+             state, time.time() + delay),
+        )
+        return cursor.lastrowid
+
+    def remove(self, entry_id: int) -> None:
+        self._db.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    complete = remove
+
+    def has_earlier(self, entry_id: int) -> bool:
+        """True if an older event of the same bug is still waiting or running."""
+        row = self._db.execute(
+            "SELECT 1 FROM outbox o WHERE o.id < ? AND o.bug_key = (SELECT bug_key FROM outbox WHERE id = ?) LIMIT 1",
+            (entry_id, entry_id),
+        ).fetchone()
+        return row is not None
+
+    def earlier_ids(self, entry_id: int) -> List[int]:
+        """Ids of the older events of the same bug still in the outbox."""
+        rows = self._db.execute(
+            "SELECT o.id FROM outbox o WHERE o.id < ? AND o.bug_key = (SELECT bug_key FROM outbox WHERE id = ?) "
+            "ORDER BY o.id",
+            (entry_id, entry_id),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def defer(self, entry_id: int) -> None:
+        """Park an event until the older events of its bug are done."""
+        self._db.execute("UPDATE outbox SET state = ? WHERE id = ?", (PENDING, entry_id))
+
+    def postpone(self, entry_id: int, delay: float) -> None:
+        """Park an event for delay seconds without counting an attempt."""
+        self._db.execute("UPDATE outbox SET state = ?, next_attempt_at = ? WHERE id = ?",
+                         (PENDING, time.time() + delay, entry_id))
+
+    def fail(self, entry_id: int, error: Exception) -> Optional[float]:
+        """Schedule a retry for a failed event, or dead-letter it.
+
+        Returns the retry delay in seconds, or None if the event was dead-lettered.
+        """
+        row = self._db.execute("SELECT attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        attempts = row[0] + 1
+        if not is_retryable(error) or attempts >= self.max_attempts:
+            self.dead_letter(entry_id, error)
+            return None
+        delay = max(backoff_delay(attempts), retry_after_seconds(error) or 0)
+        self._db.execute(
+            "UPDATE outbox SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (PENDING, attempts, time.time() + delay, str(error), entry_id),
+        )
+        return delay
+
+    def dead_letter(self, entry_id: int, error: Exception) -> None:
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO dead_letters (id, bug_key, payload, project_config, attempts, last_error, "
+                "failed_at) SELECT id, bug_key, payload, project_config, attempts + 1, ?, ? FROM outbox WHERE id = ?",
+                (str(error), time.time(), entry_id),
+            )
+            conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def claim_due(self, limit: int = 100) -> List[tuple]:
+        """Mark due events as queued and return them as (id, payload, project_config)."""
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, project_config FROM outbox o WHERE state = ? AND next_attempt_at <= ? "
+                "AND id = (SELECT MIN(id) FROM outbox WHERE bug_key = o.bug_key) ORDER BY id LIMIT ?",
+                (PENDING, time.time(), limit),
+            ).fetchall()
+            conn.executemany("UPDATE outbox SET state = ? WHERE id = ?", [(QUEUED, row[0]) for row in rows])
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return [(row[0], json.loads(row[1]), freeze(json.loads(row[2]))) for row in rows]
+
+    def release(self, entry_id: int) -> None:
+        """Put a claimed event back, e.g. when its worker lane is full."""
+        self.defer(entry_id)
+
+    def requeue_all(self) -> int:
+        """Make events left queued by a previous process eligible again."""
+        return self._db.execute("UPDATE outbox SET state = ? WHERE state = ?", (PENDING, QUEUED)).rowcount
+
+    def pending_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def dead_letters(self) -> List[dict]:
+        rows = self._db.execute(
+            "SELECT id, bug_key, attempts, last_error, failed_at FROM dead_letters ORDER BY id").fetchall()
+        return [dict(zip(("id", "bug", "attempts", "last_error", "failed_at"), row)) for row in rows]
+
+    def replay_dead_letters(self, ids: Optional[List[int]] = None) -> int:
+        """Move dead letters (all, or the given ids) back into the outbox. Returns how many moved."""
+        where, params = "", ()
+        if ids:
+            where = f" WHERE id IN ({','.join('?' * len(ids))})"
+            params = tuple(ids)
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Keep the original id so the event keeps its place in its bug's order
+            moved = conn.execute(
+                "INSERT INTO outbox (id, bug_key, payload, project_config, state, attempts, next_attempt_at) "
+                f"SELECT id, bug_key, payload, project_config, ?, 0, ? FROM dead_letters{where}",
+                (PENDING, time.time()) + params,
+            ).rowcount
+            conn.execute(f"DELETE FROM dead_letters{where}", params)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return moved
+
+
+class OutboxPoller:
+    """Background thread handing due outbox events to the worker lanes.
+
+    Nothing is handed out while paused() returns True (e.g. the Jira circuit
+    breaker is open).
+    """
+
+    def __init__(self, outbox: Outbox, submit: Callable[..., bool], interval: float = 1.0,
+                 paused: Optional[Callable[[], bool]] = None):
+        self._outbox = outbox
+        self._submit = submit
+        self._interval = interval
+        self._paused = paused
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._outbox.requeue_all()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(self._interval * 2)
+
+    def poll_once(self) -> int:
+        if self._paused and self._paused():
+            return 0
+        released = 0
+        for entry_id, payload, project_config in self._outbox.claim_due():
+            if self._submit(payload, project_config, entry_id):
+                released += 1
+            else:
+                self._outbox.release(entry_id)
+        return released
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Outbox poller failed: {e}")
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Return the outbox, or None unless app.outbox_enabled is set and a state database is configured."""
+    app_config = global_config.get("app") or {}
+    db = get_state_db()
+    if not app_config.get("outbox_enabled") or not db:
+        return None
+    return Outbox(db, max_attempts=int(app_config.get("outbox_max_attempts") or DEFAULT_MAX_ATTEMPTS))
@@ -0,0 +1,45 @@
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the standard library decoder is the fallback
+    orjson = None
+
+from lp_jira_sync_app.utils.jira_utils import UPDATABLE_FIELDS
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+
+def loads(body: bytes) -> Any:
+    """Decode a JSON body with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def parse_webhook_body(body: bytes) -> dict:
+    """Parse a verified webhook body, raising HTTP 400 if it is not a JSON object."""
+    try:
+        payload = loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+    return payload
+
+
+def validate_webhook_payload(payload: dict) -> bool:
+    """Check the fields sync_launchpad_action relies on before any Jira work starts.
+
+    Raises HTTP 422 for payloads the bot cannot handle and returns False for
+    *-changed events of fields that are not synced to Jira.
+    """
+    action = payload.get("action")
+    bug = payload.get("bug")
+    known = action == "created" or (isinstance(action, str) and action.endswith("-changed"))
+    if not known or not isinstance(bug, str) or not bug or not isinstance(payload.get("new"), dict):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return action == "created" or action[:-len("-changed")] in UPDATABLE_FIELDS
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token without waiting. Returns the seconds until it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is the queue of callers ahead of us
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token from a bucket before every request.
+
+    on_send, if given, is called with each outgoing request (e.g. to count it).
+    on_result, if given, is called with (ok, seconds) after each request, where
+    ok is False for network errors and 429/5xx answers.
+    """
+
+    def __init__(self, bucket: Optional[TokenBucket], on_send: Optional[Callable] = None,
+                 on_result: Optional[Callable[[bool, float], None]] = None, **kwargs):
+        self.bucket = bucket
+        self.on_send = on_send
+        self.on_result = on_result
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.bucket:
+            self.bucket.acquire()
+        if self.on_send:
+            self.on_send(request)
+        if not self.on_result:
+            return super().send(request, **kwargs)
+        started = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            self.on_result(False, time.monotonic() - started)
+            raise
+        self.on_result(is_healthy_status(response.status_code), time.monotonic() - started)
+        return response
+
+
+def is_healthy_status(status_code: int) -> bool:
+    """False for answers that mean Jira is throttling or failing."""
+    return status_code != 429 and status_code < 500
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(instance: str, rate: float, burst: Optional[float] = None) -> Optional[TokenBucket]:
+    """Return the shared bucket of a Jira instance, or None when rate is not positive."""
+    if not rate or rate <= 0:
+        return None
+    with _buckets_lock:
+        bucket = _buckets.get(instance)
+        if bucket is None or bucket.rate != rate:
+            bucket = _buckets[instance] = TokenBucket(rate, burst)
+        return bucket
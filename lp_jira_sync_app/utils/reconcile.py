@@ -0,0 +1,195 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterable, List, Optional, Set, Tuple
+
+
+from lp_jira_sync_app.utils.config import logger
+from lp_jira_sync_app.utils.issue_index import IssueIndex
+from lp_jira_sync_app.utils.jira_utils import build_issue_fields, launchpad_bug_url, mapped_status, \
+    match_bug_issues, update_jira_issue
+from lp_jira_sync_app.utils.state_db import StateDB
+
+if TYPE_CHECKING:
+    from jira import JIRA
+
+DEFAULT_BATCH_SIZE = 50
+# The description names the Launchpad bug, which identifies moved issues
+RECONCILE_FIELDS = "summary,status,priority,issuetype,project,description"
+
+
+# Bugs without a (valid) timestamp sort first and are only compared by a run without a mark
+NO_TIMESTAMP = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def parse_timestamp(value: Optional[str]) -> datetime:
+    """Parse an ISO timestamp to an aware datetime (naive ones are UTC)."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return NO_TIMESTAMP
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def bug_updated_at(payload: dict) -> datetime:
+    """Time of the bug's last change in Launchpad, NO_TIMESTAMP if the snapshot has none."""
+    new = payload.get("new") or {}
+    return parse_timestamp(payload.get("date_last_updated") or new.get("date_last_updated"))
+
+
+def _snapshot_order(payload: dict) -> Tuple[datetime, str]:
+    return bug_updated_at(payload), payload.get("bug") or ""
+
+
+def read_snapshot(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def drifted_fields(issue, payload: dict, project_config) -> Set[str]:
+    """Launchpad fields whose value in Jira differs from the snapshot."""
+    expected = build_issue_fields(payload, project_config)
+    fields = issue.fields
+    drift = set()
+    if expected["summary"] is not None and fields.summary != expected["summary"]:
+        drift.add("title")
+    status = mapped_status(payload, project_config)
+    if status and getattr(getattr(fields, "status", None), "name", None) != status:
+        drift.add("status")
+    if "priority" in expected and getattr(getattr(fields, "priority", None), "name", None) != \
+            expected["priority"]["name"]:
+        drift.add("importance")
+    if project_config.get("sync_description", False) and \
+            (getattr(fields, "description", None) or "").strip() != expected["description"].strip():
+        drift.add("description")
+    return drift
+
+
+class Reconciler:
+    """Repairs drift between a Launchpad state snapshot and Jira.
+
+    Only bugs updated in Launchpad after the stored high-water mark are
+    compared. Their issues are fetched with one `key in (...)` search per
+    batch, and only the fields that differ go through update_jira_issue.
+    A run stops when it reaches its time or API call budget; the mark then
+    holds the timestamp of the last bug that was fully handled plus the bugs
+    handled at exactly that timestamp, so the next run continues with the
+    rest of them.
+    """
+
+    def __init__(self, jira_client: "JIRA", db: StateDB, project_config, max_seconds: float = 300,
+                 max_api_calls: int = 1000, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        self.jira_client = jira_client
+        self.db = db
+        self.index = IssueIndex(db)
+        self.project_config = project_config
+        self.project_key = project_config.get("jira_project_key")
+        self.high_water_mark = f"reconcile:{self.project_key}"
+        self.max_seconds = max_seconds
+        self.max_api_calls = max_api_calls
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.api_calls = 0
+        self.stats = {"checked": 0, "repaired": 0, "unsynced": 0, "missing": 0, "stopped_early": False}
+        session = getattr(jira_client, "_session", None)
+        if session is not None:
+            session.hooks["response"].append(self._count_call)
+
+    def _count_call(self, response, *args, **kwargs):
+        self.api_calls += 1
+
+    def _out_of_budget(self, started: float) -> bool:
+        return time.monotonic() - started >= self.max_seconds or self.api_calls >= self.max_api_calls
+
+    def _read_mark(self) -> Tuple[Optional[datetime], Set[str]]:
+        value = self.db.get_value(self.high_water_mark)
+        if not value:
+            return None, set()
+        if not value.startswith("{"):
+            # Plain timestamp written by earlier versions
+            return parse_timestamp(value), set()
+        mark = json.loads(value)
+        return parse_timestamp(mark["at"]), set(mark["bugs"])
+
+    def run(self, snapshot: Iterable[dict]) -> dict:
+        started = time.monotonic()
+        mark, handled = self._read_mark()
+        changed = sorted((p for p in snapshot if mark is None or bug_updated_at(p) > mark or
+                          (bug_updated_at(p) == mark and p.get("bug") not in handled)), key=_snapshot_order)
+        for offset in range(0, len(changed), self.batch_size):
+            if self._out_of_budget(started):
+                self.stats["stopped_early"] = True
+                break
+            batch = changed[offset:offset + self.batch_size]
+            done = self._reconcile_batch(batch, started)
+            if done:
+                last = bug_updated_at(done[-1])
+                if last != mark:
+                    mark, handled = last, set()
+                handled.update(p.get("bug") for p in done if bug_updated_at(p) == mark)
+                if not self.dry_run:
+                    self.db.set_value(self.high_water_mark,
+                                      json.dumps({"at": mark.isoformat(), "bugs": sorted(handled)}))
+            if len(done) < len(batch):
+                self.stats["stopped_early"] = True
+                break
+        self.stats["api_calls"] = self.api_calls
+        return self.stats
+
+    def _reconcile_batch(self, batch: List[dict], started: float) -> List[dict]:
+        """Reconcile a batch; returns the bugs handled before the budget ran out."""
+        keys = {}
+        for payload in batch:
+            key = self.index.get(launchpad_bug_url(payload), self.project_key)
+            if key:
+                keys[id(payload)] = key
+        issues = {}
+        if keys:
+            wanted = sorted(set(keys.values()))
+            # With validation, one deleted key fails the whole search with a 400
+            found = self.jira_client.search_issues(f"key in ({','.join(wanted)})", maxResults=len(wanted),
+                                                   fields=RECONCILE_FIELDS, validate_query=False)
+            issues = {issue.key: issue for issue in found}
+            self._follow_moved_issues(batch, keys, [issue for issue in found if issue.key not in wanted])
+
+        done = []
+        for payload in batch:
+            key = keys.get(id(payload))
+            if key is None:
+                self.stats["unsynced"] += 1
+            elif key not in issues:
+                self.stats["missing"] += 1
+                logger.warning(f"Jira issue {key} of Launchpad Bug {launchpad_bug_url(payload)} was not found")
+            else:
+                if self._out_of_budget(started):
+                    break
+                self.stats["checked"] += 1
+                drift = drifted_fields(issues[key], payload, self.project_config)
+                if drift:
+                    logger.info(f"Repairing {sorted(drift)} of {key} from Launchpad Bug {launchpad_bug_url(payload)}")
+                    if not self.dry_run:
+                        update_jira_issue(self.jira_client, issues[key], payload, self.project_config, drift)
+                    self.stats["repaired"] += 1
+            done.append(payload)
+        return done
+
+    def _follow_moved_issues(self, batch: List[dict], keys: dict, moved: list) -> None:
+        """Point the indexed keys of moved or renamed issues at the key Jira returned them under.
+
+        Jira answers a search for an old key with the issue under its new key;
+        the issue's description names the Launchpad bug it belongs to.
+        """
+        if not moved:
+            return
+        found_keys = {issue.key for issue in moved}
+        stale = {launchpad_bug_url(payload): payload for payload in batch
+                 if id(payload) in keys and keys[id(payload)] not in found_keys}
+        matches = match_bug_issues(moved, list(stale), lambda issue: getattr(issue.fields, "description", None))
+        for bug_url, issue in matches.items():
+            if issue is None:
+                continue
+            payload = stale[bug_url]
+            logger.info(f"Jira issue {keys[id(payload)]} of Launchpad Bug {bug_url} is now {issue.key}")
+            keys[id(payload)] = issue.key
+            if not self.dry_run:
+                self.index.put(bug_url, self.project_key, issue.key)
@@ -1,9 +1,12 @@
 import hmac
 import hashlib
-from typing import Optional
+from typing import Optional, Union
 from functools import wraps
 from fastapi import HTTPException, status
 
+from lp_jira_sync_app.utils.metrics import STAGE_SECONDS
+from lp_jira_sync_app.utils.payload import parse_webhook_body, DEFAULT_MAX_BODY_BYTES
+
 def parse_signature(sig_header: Optional[str]) -> Optional[str]:
     """Extract the hex digest from X-Hub-Signature header.
     Returns hex digest string or None if not present/invalid.
@@ -16,21 +19,58 @@ def parse_signature(sig_header: Optional[str]) -> Optional[str]:
     return None
 
 
-def verify_hmac_sha1(body: bytes, provided_hex: str, secret: str) -> bool:
-    mac = hmac.new(secret.encode("utf-8"), body, hashlib.sha1)
+def new_hmac_sha1(secret: str) -> "hmac.HMAC":
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha1)
+
+
+def verify_hmac_sha1(body: Union[bytes, "hmac.HMAC"], provided_hex: Optional[str], secret: str) -> Optional[str]:
+    """Return the body's HMAC-SHA1 hex digest if it matches provided_hex, otherwise None.
+
+    body is either the raw bytes or a new_hmac_sha1(secret) that was fed the
+    body as it arrived.
+    """
+    if isinstance(body, (bytes, bytearray)):
+        mac = new_hmac_sha1(secret)
+        mac.update(body)
+    else:
+        mac = body
     expected_hex = mac.hexdigest()
-    return hmac.compare_digest(expected_hex, provided_hex)
+    if not provided_hex or not hmac.compare_digest(expected_hex, provided_hex):
+        return None
+    return expected_hex
+
+async def read_body(request, max_bytes: int, mac: Optional["hmac.HMAC"] = None) -> bytes:
+    """Stream the request body, feeding each chunk to mac.
+
+    Raises HTTP 413 as soon as the body (or its declared length) exceeds max_bytes.
+    """
+    declared = request.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if mac is not None:
+            mac.update(chunk)
+        body += chunk
+    return bytes(body)
+
 
 # Decorator to require valid HMAC signature on FastAPI handlers
-def require_hmac_signature(secret: str):
+def require_hmac_signature(secret: str, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
     """Decorator factory that enforces HMAC-SHA1 verification for webhook endpoints.
-    - Reads request body and verifies X-Hub-Signature using the provided secret.
+    - Streams the body (HTTP 413 above max_body_bytes), hashing it as it arrives.
     - Raises HTTP 401 on missing server secret or invalid/missing signature.
+    - Parses the verified body once and stores it in request.state.payload,
+      and its HMAC digest in request.state.body_digest.
     """
     def decorator(func):
         @wraps(func)
         async def wrapper(request, *args, **kwargs):
-            body = await request.body()
+            mac = new_hmac_sha1(secret) if secret else None
+            with STAGE_SECONDS.time("read_body"):
+                body = await read_body(request, max_body_bytes, mac)
             if not body:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST
@@ -41,10 +81,15 @@ def require_hmac_signature(secret: str):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED
                 )
-            if not hex_sig or not verify_hmac_sha1(body, hex_sig, secret):
+            with STAGE_SECONDS.time("hmac_verification"):
+                digest = verify_hmac_sha1(mac, hex_sig, secret)
+            if digest is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED
                 )
+            with STAGE_SECONDS.time("parse_payload"):
+                request.state.payload = parse_webhook_body(body)
+            request.state.body_digest = digest
             return await func(request, *args, **kwargs)
 
         return wrapper
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+from lp_jira_sync_app.utils.config import global_config
+
+VALUES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_values (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class StateDB:
+    """Small SQLite (WAL mode) store for the bot's local state.
+
+    Every thread gets its own connection, so readers never wait on the
+    worker that is currently writing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schemas = set()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ensure_schema(self, schema: str) -> None:
+        """Run a CREATE ... IF NOT EXISTS script once per process."""
+        if schema in self._schemas:
+            return
+        with self._schema_lock:
+            if schema not in self._schemas:
+                self.connection().executescript(schema)
+                self._schemas.add(schema)
+
+    def execute(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, tuple(params))
+
+    def executemany(self, sql: str, rows: Iterable[Iterable]) -> None:
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(sql, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get_value(self, name: str) -> Optional[str]:
+        """Read a named value such as an import checkpoint."""
+        self.ensure_schema(VALUES_SCHEMA)
+        row = self.execute("SELECT value FROM state_values WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_value(self, name: str, value: str) -> None:
+        self.ensure_schema(VALUES_SCHEMA)
+        self.execute("INSERT OR REPLACE INTO state_values (name, value) VALUES (?, ?)", (name, value))
+
+
+_databases: Dict[str, StateDB] = {}
+_databases_lock = threading.Lock()
+
+
+def get_state_db() -> Optional[StateDB]:
+    """Return the configured state database, or None when app.state_db_path is unset."""
+    path = (global_config.get("app") or {}).get("state_db_path")
+    if not path:
+        return None
+    db = _databases.get(path)
+    if db is None:
+        with _databases_lock:
+            db = _databases.setdefault(path, StateDB(path))
+    return db
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 3600
+
+WorkflowKey = Tuple[str, str]
+
+
+class TransitionGraphCache:
+    """Workflow graphs learned from Jira, one per (project, issue type).
+
+    Each graph maps a status name to the transitions available from it
+    ({target status: transition id}). Edges are learned from the
+    transitions Jira reports, expire after a TTL, and are dropped as a
+    whole when a transition fails.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._graphs: Dict[WorkflowKey, Dict[str, Tuple[float, Dict[str, str]]]] = {}
+        self._lock = threading.Lock()
+
+    def learn(self, workflow: WorkflowKey, status: str, transitions: List[dict]) -> None:
+        """Store the transitions Jira returned for an issue in `status`."""
+        edges = {t["to"]["name"]: t["id"] for t in transitions}
+        with self._lock:
+            self._graphs.setdefault(workflow, {})[status] = (time.monotonic() + self.ttl, edges)
+
+    def edges(self, workflow: WorkflowKey, status: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._graphs.get(workflow, {}).get(status)
+            if entry is None:
+                return None
+            expires, edges = entry
+            if expires < time.monotonic():
+                del self._graphs[workflow][status]
+                return None
+            return edges
+
+    def route(self, workflow: WorkflowKey, from_status: str, to_status: str) -> Optional[List[Tuple[str, str]]]:
+        """Shortest list of (transition id, status) hops between two statuses, or None if unknown."""
+        previous: Dict[str, Tuple[str, str]] = {}
+        queue = deque([from_status])
+        seen = {from_status}
+        while queue:
+            status = queue.popleft()
+            for target, transition_id in (self.edges(workflow, status) or {}).items():
+                if target in seen:
+                    continue
+                seen.add(target)
+                previous[target] = (status, transition_id)
+                if target == to_status:
+                    path = []
+                    while target != from_status:
+                        status, transition_id = previous[target]
+                        path.append((transition_id, target))
+                        target = status
+                    return path[::-1]
+                queue.append(target)
+        return None
+
+    def unexplored(self, workflow: WorkflowKey, from_status: str) -> List[str]:
+        """Statuses reachable from from_status over known edges whose own edges are not known."""
+        found = []
+        queue = deque([from_status])
+        seen = {from_status}
+        while queue:
+            edges = self.edges(workflow, queue.popleft())
+            for target in edges or {}:
+                if target in seen:
+                    continue
+                seen.add(target)
+                if self.edges(workflow, target) is None:
+                    found.append(target)
+                else:
+                    queue.append(target)
+        return found
+
+    def invalidate(self, workflow: WorkflowKey) -> None:
+        with self._lock:
+            self._graphs.pop(workflow, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
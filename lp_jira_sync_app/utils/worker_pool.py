@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+import zlib
+from typing import Callable, List
+
+from lp_jira_sync_app.utils.config import logger
+
+DEFAULT_WORKER_COUNT = 4
+DEFAULT_QUEUE_SIZE = 1000
+
+_STOP = object()
+
+
+class _Lane:
+    """One serial queue and the thread draining it."""
+
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.busy_seconds = 0.0
+        self.processed = 0
+
+
+class WebhookWorkerPool:
+    """Bug-sharded pool of worker lanes for accepted webhook events.
+
+    The bug id of each event is hashed to one of `worker_count` lanes, and
+    every lane is drained by a single thread. Events for the same bug are
+    therefore applied strictly in arrival order (a comment never overtakes
+    its bug's creation), while different bugs are synced in parallel.
+    Workers are started lazily on the first submit.
+    """
+
+    def __init__(self, handler: Callable[..., None], worker_count: int = DEFAULT_WORKER_COUNT,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        self._handler = handler
+        lane_count = max(1, worker_count)
+        lane_queue_size = max(1, queue_size // lane_count)
+        self._lanes = [_Lane(i, lane_queue_size) for i in range(lane_count)]
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for lane in self._lanes:
+                lane.thread = threading.Thread(target=self._run, args=(lane,),
+                                               name=f"webhook-lane-{lane.index}", daemon=True)
+                lane.thread.start()
+            self._started = True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let lanes finish queued events and exit."""
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        for lane in self._lanes:
+            lane.queue.put(_STOP)
+        for lane in self._lanes:
+            lane.thread.join(timeout)
+
+    def lane_for(self, payload: dict) -> int:
+        bug_id = (payload.get("bug") or "").split("/")[-1]
+        return zlib.crc32(bug_id.encode("utf-8")) % len(self._lanes)
+
+    def submit(self, payload: dict, project_config: dict, *args) -> bool:
+        """Queue an event on its bug's lane. Returns False when that lane is full.
+
+        Extra arguments are passed on to the handler after the project config.
+        """
+        self.start()
+        try:
+            self._lanes[self.lane_for(payload)].queue.put_nowait((payload, project_config) + args)
+        except queue.Full:
+            return False
+        return True
+
+    def qsize(self) -> int:
+        return sum(lane.queue.qsize() for lane in self._lanes)
+
+    def lane_stats(self) -> List[dict]:
+        """Queue length, events processed and seconds spent processing, per lane."""
+        return [
+            {"lane": lane.index, "queued": lane.queue.qsize(), "processed": lane.processed,
+             "busy_seconds": lane.busy_seconds}
+            for lane in self._lanes
+        ]
+
+    def _run(self, lane: _Lane) -> None:
+        while True:
+            item = lane.queue.get()
+            if item is _STOP:
+                return
+            started = time.monotonic()
+            try:
+                self._handler(*item)
+            except Exception as e:
+                logger.error(f"Webhook worker failed to process event: {e}")
+            finally:
+                lane.busy_seconds += time.monotonic() - started
+                lane.processed += 1